@@ -1,10 +1,23 @@
 import os
+import time
+import uuid
+import hmac
+import hashlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, g, render_template, jsonify, request
 import schwabdev
 from openai import OpenAI
 import anthropic
+from positions import fetch_accounts, merge_holdings
+from snapshot import RecommendationSnapshot
+from candidate_index import CandidateIndex, SORT_FIELDS, parse_sort
+from chain_parser import parse_call_chain
+from shared_cache import SharedCache
+from profiling import ProfileStore, Sampler
+from resilience import CircuitBreaker, Deadline, call_with_deadline
 
 # Setup logging
 logging.basicConfig(
@@ -22,6 +35,275 @@ app = Flask(__name__, static_folder="static", static_url_path="/static")
 
 client = schwabdev.Client(os.getenv("SCHWAB_APP_KEY"), os.getenv("SCHWAB_APP_SECRET"))
 
+recommendations_snapshot = RecommendationSnapshot()
+candidate_index = CandidateIndex([])
+
+# Set CHAIN_ARCHIVE_DIR to keep every fetched chain for backtest.py.
+# The archive needs numpy, so it's only imported when enabled.
+chain_archive = None
+if os.getenv("CHAIN_ARCHIVE_DIR"):
+    from chain_archive import ChainArchive, chain_columns
+
+    chain_archive = ChainArchive(os.getenv("CHAIN_ARCHIVE_DIR"))
+
+# Set SHARED_CACHE_PATH so every worker process shares upstream results
+shared_cache = (
+    SharedCache(os.getenv("SHARED_CACHE_PATH"))
+    if os.getenv("SHARED_CACHE_PATH")
+    else None
+)
+
+# Profiling: ?profile=1 from an allow-listed address (or with X-Profile-Secret),
+# plus automatic capture of anything slower than PROFILE_SLOW_MS
+PROFILE_ALLOWED_IPS = {
+    ip for ip in os.getenv("PROFILE_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip
+}
+PROFILE_SECRET = os.getenv("PROFILE_SECRET", "")
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+
+profile_sampler = Sampler(float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000)
+profile_store = ProfileStore(int(os.getenv("PROFILE_BUFFER_SIZE", "20")))
+
+CACHE_TTLS = {
+    "positions": 30,
+    "chain": 30,
+    "candles": 60,
+    "llm": 15 * 60,
+}
+
+# Overall time budget per route in seconds, shared by all of its upstream calls
+ROUTE_DEADLINES = {
+    "candles": float(os.getenv("CANDLES_DEADLINE", "5")),
+    "recommendations": float(os.getenv("RECOMMENDATIONS_DEADLINE", "10")),
+    "recommendation": float(os.getenv("RECOMMENDATION_DEADLINE", "30")),
+}
+
+breakers = {name: CircuitBreaker(name) for name in ("schwab", "anthropic", "openai")}
+
+# Last good value per key, for stale-if-error when there's no shared cache
+last_good = {}
+
+
+def cached(kind, key, loader, deadline=None, upstream="schwab"):
+    """Load through the cache within `deadline`, guarded by the upstream's breaker.
+
+    Returns (value, stale_age). stale_age is None for fresh data; when the
+    upstream fails or runs out of time it is the age in seconds of the
+    last-known-good value returned instead.
+    """
+    cache_key = f"{kind}:{key}"
+
+    def guarded():
+        return call_with_deadline(
+            profile_sampler.wrap(loader), deadline, breakers[upstream]
+        )
+
+    try:
+        if shared_cache is None:
+            value = guarded()
+            if kind != "llm":
+                last_good[cache_key] = (value, time.time())
+        else:
+            value = shared_cache.get_or_load(
+                cache_key,
+                CACHE_TTLS[kind],
+                guarded,
+                timeout=deadline.remaining() if deadline else None,
+            )
+        return value, None
+    except Exception as e:
+        if shared_cache is None:
+            stale = last_good.get(cache_key)
+        else:
+            stale = shared_cache.get_stale(cache_key)
+        if stale is None:
+            raise
+        value, stored_at = stale
+        age = round(time.time() - stored_at, 1)
+        logger.warning(f"Serving {cache_key} from {age}s ago after upstream error: {e}")
+        return value, age
+
+
+# With a shared cache, the recommendations snapshot and candidate index are
+# published there too, so every worker serves the same versions and rows
+SHARED_STATE_TTL = 7 * 24 * 3600
+shared_state_stamp = None
+
+
+def sync_shared_state():
+    """Pick up the snapshot and candidate index last published by any worker."""
+    global recommendations_snapshot, candidate_index, shared_state_stamp
+    if shared_cache is None:
+        return
+
+    # The stamp is written last, so rows read after it are at least as new
+    stamp = shared_cache.get("state:stamp")
+    if stamp is None or stamp == shared_state_stamp:
+        return
+    snapshot_state = shared_cache.get("state:snapshot")
+    rows = shared_cache.get("state:candidates")
+    if snapshot_state is None or rows is None:
+        return
+
+    snapshot = RecommendationSnapshot.from_state(snapshot_state)
+    candidate_index = CandidateIndex(rows, snapshot.version)
+    recommendations_snapshot = snapshot
+    shared_state_stamp = stamp
+
+
+def publish_recommendations(recommendations, candidates):
+    """Update the snapshot and rebuild the candidate index, shared across workers.
+
+    Returns the updated snapshot.
+    """
+    global recommendations_snapshot, candidate_index, shared_state_stamp
+    if shared_cache is None:
+        version = recommendations_snapshot.update(recommendations)
+        candidate_index = CandidateIndex(candidates, version)
+        return recommendations_snapshot
+
+    with shared_cache.lock("state:snapshot"):
+        snapshot_state = shared_cache.get("state:snapshot")
+        snapshot = (
+            RecommendationSnapshot.from_state(snapshot_state)
+            if snapshot_state
+            else RecommendationSnapshot()
+        )
+        version = snapshot.update(recommendations)
+        stamp = uuid.uuid4().hex
+        shared_cache.set("state:candidates", candidates, SHARED_STATE_TTL)
+        shared_cache.set("state:snapshot", snapshot.state(), SHARED_STATE_TTL)
+        shared_cache.set("state:stamp", stamp, SHARED_STATE_TTL)
+
+    candidate_index = CandidateIndex(candidates, version)
+    recommendations_snapshot = snapshot
+    shared_state_stamp = stamp
+    return snapshot
+
+
+def load_accounts(deadline=None):
+    return cached("positions", "all", lambda: fetch_accounts(client), deadline)
+
+
+def load_chain(symbol, deadline=None):
+    def fetch():
+        # Calls only, parsed straight from the response bytes into compact arrays
+        response = client.option_chains(symbol, contractType="CALL")
+        response.raise_for_status()
+        chain = parse_call_chain(response.content)
+        underlying_price = chain["underlyingPrice"]
+        if chain_archive and underlying_price > 0:
+            try:
+                chain_archive.append(
+                    symbol, int(time.time()), underlying_price, chain_columns(chain)
+                )
+            except Exception as e:
+                logger.warning(f"Error archiving options chain for {symbol}: {e}")
+        return chain
+
+    return cached("chain", symbol, fetch, deadline)
+
+
+def call_llm(provider, model, prompt, timeout=None):
+    if provider == "openai":
+        if model == "o3-mini":
+            response = openai_client.chat.completions.create(
+                model="o3-mini",
+                reasoning_effort="low",
+                messages=[{"role": "user", "content": prompt}],
+                timeout=timeout,
+            )
+        else:
+            response = openai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=300,
+                timeout=timeout,
+            )
+        return response.choices[0].message.content
+
+    response = anthropic_client.messages.create(
+        model="claude-sonnet-4-20250514",
+        max_tokens=300,
+        messages=[{"role": "user", "content": prompt}],
+        timeout=timeout,
+    )
+    return response.content[0].text
+
+
+def profiling_allowed():
+    secret = request.headers.get("X-Profile-Secret", "")
+    if PROFILE_SECRET and hmac.compare_digest(secret, PROFILE_SECRET):
+        return True
+    # Behind a proxy every request looks local, so forwarded requests need the secret
+    if "X-Forwarded-For" in request.headers:
+        return False
+    return request.remote_addr in PROFILE_ALLOWED_IPS
+
+
+@app.before_request
+def start_profile():
+    g.profile_requested = request.args.get("profile") == "1" and profiling_allowed()
+    if g.profile_requested or PROFILE_SLOW_MS > 0:
+        g.profile_thread = threading.get_ident()
+        g.profile_started = time.perf_counter()
+        profile_sampler.start(g.profile_thread)
+
+
+@app.after_request
+def finish_profile(response):
+    if "profile_thread" not in g:
+        return response
+
+    counts = profile_sampler.stop(g.profile_thread)
+    duration_ms = (time.perf_counter() - g.profile_started) * 1000
+    slow = PROFILE_SLOW_MS > 0 and duration_ms >= PROFILE_SLOW_MS
+    if g.profile_requested or slow:
+        profile_id = profile_store.add(
+            counts,
+            method=request.method,
+            path=request.full_path,
+            status=response.status_code,
+            durationMs=round(duration_ms, 1),
+            startedAt=time.time() - duration_ms / 1000,
+            reason="requested" if g.profile_requested else "slow",
+        )
+        if g.profile_requested:
+            response.headers["X-Profile-Id"] = str(profile_id)
+        else:
+            logger.warning(
+                f"Slow request {request.method} {request.full_path} took "
+                f"{duration_ms:.0f}ms, captured profile {profile_id}"
+            )
+    return response
+
+
+@app.teardown_request
+def stop_profile(exc):
+    # after_request is skipped on unhandled errors; make sure sampling stops
+    if "profile_thread" in g:
+        profile_sampler.stop(g.profile_thread)
+
+
+@app.route("/admin/profiles")
+def list_profiles():
+    if not profiling_allowed():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(profile_store.list())
+
+
+@app.route("/admin/profiles/<int:profile_id>")
+def get_profile(profile_id):
+    if not profiling_allowed():
+        return jsonify({"error": "Forbidden"}), 403
+
+    profile = profile_store.get(profile_id)
+    if not profile:
+        return jsonify({"error": "Profile not found"}), 404
+
+    # Folded stacks: pipe into flamegraph.pl or load in speedscope
+    return Response(profile["stacks"], mimetype="text/plain")
+
 
 @app.route("/")
 def index():
@@ -72,9 +354,11 @@ def get_candles(symbol):
         },
     }
 
-    params = period_map.get(period, period_map["5d"])
+    if period not in period_map:
+        period = "5d"
+    params = period_map[period]
 
-    try:
+    def fetch():
         response = client.price_history(
             symbol,
             periodType=params["periodType"],
@@ -82,99 +366,119 @@ def get_candles(symbol):
             frequencyType=params["frequencyType"],
             frequency=params["frequency"],
         )
+        response.raise_for_status()
         data = response.json()
+        return [
+            {
+                "time": c["datetime"] // 1000,
+                "open": c["open"],
+                "high": c["high"],
+                "low": c["low"],
+                "close": c["close"],
+            }
+            for c in data.get("candles", [])
+        ]
+
+    deadline = Deadline(ROUTE_DEADLINES["candles"])
+    try:
+        candles, stale_age = cached("candles", f"{symbol}:{period}", fetch, deadline)
     except Exception as e:
         logger.error(f"Error fetching candles for {symbol}: {e}")
         return jsonify({"error": f"Failed to fetch price data: {str(e)}"}), 500
 
-    candles = [
-        {
-            "time": c["datetime"] // 1000,
-            "open": c["open"],
-            "high": c["high"],
-            "low": c["low"],
-            "close": c["close"],
-        }
-        for c in data.get("candles", [])
-    ]
-
     logger.info(f"Returning {len(candles)} candles for {symbol}")
-    return jsonify(candles)
+    response = jsonify(candles)
+    if stale_age is not None:
+        response.headers["X-Stale-Age"] = str(stale_age)
+    return response
 
 
 @app.route("/api/recommendations")
 def get_recommendations():
     logger.info("Fetching recommendations for all positions")
+    deadline = Deadline(ROUTE_DEADLINES["recommendations"])
+    stale = {}
+    sync_shared_state()
 
     try:
-        accounts = client.account_linked().json()
-        account_hash = accounts[0]["hashValue"]
-        account_data = client.account_details(account_hash, fields="positions").json()
-        positions = account_data["securitiesAccount"]["positions"]
+        accounts, stale_age = load_accounts(deadline)
     except Exception as e:
         logger.error(f"Error fetching account positions: {e}")
         return jsonify({"error": f"Failed to fetch positions: {str(e)}"}), 500
 
-    holdings = {}
-    for pos in positions:
-        if pos["instrument"]["assetType"] == "EQUITY":
-            symbol = pos["instrument"]["symbol"]
-            quantity = int(pos["longQuantity"])
-            if quantity >= 100:
-                holdings[symbol] = {
-                    "shares": (quantity // 100) * 100,
-                    "avgPrice": pos["averagePrice"],
-                    "marketValue": pos["marketValue"],
-                    "gainLoss": pos["longOpenProfitLoss"],
-                }
+    holdings = {
+        symbol: info
+        for symbol, info in merge_holdings(accounts).items()
+        if info["contracts"] > 0
+    }
 
-    logger.info(f"Found {len(holdings)} positions with 100+ shares")
+    logger.info(
+        f"Found {len(holdings)} positions with 100+ shares across {len(accounts)} accounts"
+    )
+    if stale_age is not None:
+        stale["positions"] = stale_age
+
+    # Fetch chains in parallel, all within the same deadline
+    with ThreadPoolExecutor(max_workers=max(min(len(holdings), 8), 1)) as pool:
+        chain_futures = {
+            ticker: pool.submit(profile_sampler.wrap(load_chain), ticker, deadline)
+            for ticker in holdings
+        }
 
     recommendations = {}
+    all_candidates = []
+    missing = []
     for ticker, info in holdings.items():
-        contracts = info["shares"] // 100
+        contracts = info["contracts"]
 
         try:
-            response = client.option_chains(ticker)
-            data = response.json()
+            chain, stale_age = chain_futures[ticker].result()
         except Exception as e:
             logger.error(f"Error fetching options chain for {ticker}: {e}")
+            missing.append(ticker)
+            # Keep showing what we had rather than dropping the ticker
+            previous = recommendations_snapshot.get(ticker)
+            if previous:
+                recommendations[ticker] = previous
+                all_candidates.extend(candidate_index.rows(ticker))
             continue
 
-        underlying_price = data.get("underlyingPrice", 0)
+        if stale_age is not None:
+            stale[ticker] = stale_age
+
+        underlying_price = chain["underlyingPrice"]
         if underlying_price <= 0:
             logger.warning(f"Invalid underlying price for {ticker}: {underlying_price}")
             continue
 
         candidates = []
-        for exp_date, strikes in data.get("callExpDateMap", {}).items():
-            for strike_price, options in strikes.items():
-                opt = options[0]
-                delta = abs(opt.get("delta", 0))
-                dte = opt.get("daysToExpiration", 0)
-                bid = opt.get("bid", 0)
-                strike = opt.get("strikePrice", 0)
-
-                if 0.09 <= delta <= 0.2 and 1 <= dte <= 14 and bid > 0:
-                    weekly_return = (bid / underlying_price) * (7 / dte) * 100
-                    annualized_return = (bid / underlying_price) * (365 / dte) * 100
-                    total_premium = bid * contracts * 100
-                    otm_dollar = strike - underlying_price
-                    otm_pct = (otm_dollar / underlying_price) * 100
-                    candidates.append(
-                        {
-                            "strike": strike,
-                            "exp": exp_date.split(":")[0],
-                            "dte": dte,
-                            "delta": round(delta, 3),
-                            "bid": bid,
-                            "weeklyPct": round(weekly_return, 2),
-                            "annualizedPct": round(annualized_return, 2),
-                            "totalPremium": round(total_premium, 0),
-                            "otmDollar": round(otm_dollar, 2),
-                            "otmPct": round(otm_pct, 2),
-                        }
-                    )
+        calls = zip(
+            chain["exp"], chain["strike"], chain["delta"], chain["dte"], chain["bid"]
+        )
+        for exp_index, strike, delta, dte, bid in calls:
+            exp_date = chain["expirations"][exp_index]
+            delta = abs(delta)
+
+            if 0.09 <= delta <= 0.2 and 1 <= dte <= 14 and bid > 0:
+                weekly_return = (bid / underlying_price) * (7 / dte) * 100
+                annualized_return = (bid / underlying_price) * (365 / dte) * 100
+                total_premium = bid * contracts * 100
+                otm_dollar = strike - underlying_price
+                otm_pct = (otm_dollar / underlying_price) * 100
+                candidates.append(
+                    {
+                        "strike": strike,
+                        "exp": exp_date.split(":")[0],
+                        "dte": dte,
+                        "delta": round(delta, 3),
+                        "bid": bid,
+                        "weeklyPct": round(weekly_return, 2),
+                        "annualizedPct": round(annualized_return, 2),
+                        "totalPremium": round(total_premium, 0),
+                        "otmDollar": round(otm_dollar, 2),
+                        "otmPct": round(otm_pct, 2),
+                    }
+                )
 
         recommendations[ticker] = {
             "info": info,
@@ -184,94 +488,126 @@ def get_recommendations():
                 candidates, key=lambda x: x["weeklyPct"], reverse=True
             )[:10],
         }
+        all_candidates.extend({"symbol": ticker, **c} for c in candidates)
+
+    since = request.args.get("since", type=int)
+    snapshot = publish_recommendations(recommendations, all_candidates)
+    delta = snapshot.delta(since)
+    delta.update({"partial": bool(missing), "missing": missing, "stale": stale})
+
+    logger.info(
+        f"Returning {len(delta['changed'])} changed, {len(delta['removed'])} removed "
+        f"of {len(recommendations)} tickers (version={delta['version']}, since={since}, "
+        f"missing={missing}, stale={stale})"
+    )
+    return jsonify(delta)
+
+
+@app.route("/api/candidates")
+def get_candidates():
+    # Portfolio-wide query over the last screened snapshot, e.g.
+    # /api/candidates?sort=-weeklyPct,delta&maxDelta=0.15&limit=20
+    sync_shared_state()
+    index = candidate_index
+
+    ranges = {}
+    for field in SORT_FIELDS:
+        suffix = field[0].upper() + field[1:]
+        low = request.args.get(f"min{suffix}", type=float)
+        high = request.args.get(f"max{suffix}", type=float)
+        if low is not None or high is not None:
+            ranges[field] = (low, high)
 
-    logger.info(f"Returning recommendations for {len(recommendations)} tickers")
-    return jsonify(recommendations)
+    symbols = [s for s in request.args.get("symbol", "").split(",") if s]
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 500)
+
+    try:
+        sort = parse_sort(request.args.get("sort", "-weeklyPct"))
+        result = index.query(sort, ranges, symbols, offset, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    logger.info(
+        f"Returning {len(result['candidates'])} of {result['total']} candidates "
+        f"(version={result['version']})"
+    )
+    return jsonify(result)
 
 
 @app.route("/api/recommendation/<symbol>")
 def get_recommendation(symbol):
     logger.info(f"Fetching AI recommendation for {symbol}")
+    deadline = Deadline(ROUTE_DEADLINES["recommendation"])
+    stale = {}
 
     try:
-        accounts = client.account_linked().json()
-        account_hash = accounts[0]["hashValue"]
-        account_data = client.account_details(account_hash, fields="positions").json()
-        positions = account_data["securitiesAccount"]["positions"]
+        accounts, stale_age = load_accounts(deadline)
     except Exception as e:
         logger.error(f"Error fetching account positions: {e}")
         return jsonify({"error": f"Failed to fetch positions: {str(e)}"}), 500
 
-    position = None
-    for pos in positions:
-        if (
-            pos["instrument"]["assetType"] == "EQUITY"
-            and pos["instrument"]["symbol"] == symbol
-        ):
-            position = {
-                "shares": int(pos["longQuantity"]),
-                "avgPrice": pos["averagePrice"],
-                "gainLoss": pos["longOpenProfitLoss"],
-            }
-            break
+    position = merge_holdings(accounts).get(symbol)
 
     if not position:
         logger.warning(f"Position not found for {symbol}")
         return jsonify({"error": "Position not found"}), 404
+    if stale_age is not None:
+        stale["positions"] = stale_age
 
     try:
-        response = client.option_chains(symbol)
-        data = response.json()
+        chain, stale_age = load_chain(symbol, deadline)
     except Exception as e:
         logger.error(f"Error fetching options chain for {symbol}: {e}")
         return jsonify({"error": f"Failed to fetch options chain: {str(e)}"}), 500
+    if stale_age is not None:
+        stale["chain"] = stale_age
 
-    underlying_price = data.get("underlyingPrice", 0)
+    underlying_price = chain["underlyingPrice"]
     if underlying_price <= 0:
         logger.warning(f"Invalid underlying price for {symbol}: {underlying_price}")
         return jsonify({"error": "Invalid underlying price"}), 500
 
     candidates = []
-    for exp_date, strikes in data.get("callExpDateMap", {}).items():
-        for strike_price, options in strikes.items():
-            opt = options[0]
-            delta = abs(opt.get("delta", 0))
-            dte = opt.get("daysToExpiration", 0)
-            bid = opt.get("bid", 0)
-            strike = opt.get("strikePrice", 0)
-
-            if 0.10 <= delta <= 0.30 and 1 <= dte <= 14 and bid > 0:
-                contracts = position["shares"] // 100
-                weekly_return = (bid / underlying_price) * (7 / dte) * 100
-                annualized_return = (bid / underlying_price) * (365 / dte) * 100
-                otm_dollar = strike - underlying_price
-                otm_pct = (otm_dollar / underlying_price) * 100
-
-                candidates.append(
-                    {
-                        "strike": strike,
-                        "exp": exp_date.split(":")[0],
-                        "dte": dte,
-                        "delta": round(delta, 3),
-                        "bid": bid,
-                        "weeklyPct": round(weekly_return, 2),
-                        "annualizedPct": round(annualized_return, 2),
-                        "totalPremium": round(bid * contracts * 100, 0),
-                        "otmDollar": round(otm_dollar, 2),
-                        "otmPct": round(otm_pct, 2),
-                    }
-                )
+    calls = zip(
+        chain["exp"], chain["strike"], chain["delta"], chain["dte"], chain["bid"]
+    )
+    for exp_index, strike, delta, dte, bid in calls:
+        exp_date = chain["expirations"][exp_index]
+        delta = abs(delta)
+
+        if 0.10 <= delta <= 0.30 and 1 <= dte <= 14 and bid > 0:
+            contracts = position["contracts"]
+            weekly_return = (bid / underlying_price) * (7 / dte) * 100
+            annualized_return = (bid / underlying_price) * (365 / dte) * 100
+            otm_dollar = strike - underlying_price
+            otm_pct = (otm_dollar / underlying_price) * 100
+
+            candidates.append(
+                {
+                    "strike": strike,
+                    "exp": exp_date.split(":")[0],
+                    "dte": dte,
+                    "delta": round(delta, 3),
+                    "bid": bid,
+                    "weeklyPct": round(weekly_return, 2),
+                    "annualizedPct": round(annualized_return, 2),
+                    "totalPremium": round(bid * contracts * 100, 0),
+                    "otmDollar": round(otm_dollar, 2),
+                    "otmPct": round(otm_pct, 2),
+                }
+            )
 
     candidates = sorted(candidates, key=lambda x: x["weeklyPct"], reverse=True)[:10]
 
     prompt = f"""You are an options trading advisor. Give a specific covered call recommendation for {symbol}.
 
 POSITION:
-- Shares: {position["shares"]}
+- Shares: {position["totalShares"]}
 - Cost basis: ${position["avgPrice"]:.2f}
 - Current price: ${underlying_price:.2f}
 - Unrealized P/L: ${position["gainLoss"]:.0f}
-- Contracts available: {position["shares"] // 100}
+- Contracts available: {position["contracts"]}
 
 TOP CC CANDIDATES:
 """
@@ -298,43 +634,35 @@ Format your response as:
 
     logger.info(f"Calling LLM provider={provider}, model={model}")
 
+    result = {
+        "symbol": symbol,
+        "recommendation": None,
+        "candidates": candidates,
+        "position": position,
+        "currentPrice": underlying_price,
+        "partial": False,
+        "stale": stale,
+    }
+
     try:
-        if provider == "openai":
-            if model == "o3-mini":
-                response = openai_client.chat.completions.create(
-                    model="o3-mini",
-                    reasoning_effort="low",
-                    messages=[{"role": "user", "content": prompt}],
-                )
-            else:
-                response = openai_client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=300,
-                )
-            recommendation = response.choices[0].message.content
-        else:
-            response = anthropic_client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=300,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            recommendation = response.content[0].text
+        prompt_hash = hashlib.sha1(f"{provider}|{model}|{prompt}".encode()).hexdigest()
+        result["recommendation"], _ = cached(
+            "llm",
+            prompt_hash,
+            lambda: call_llm(provider, model, prompt, timeout=deadline.remaining()),
+            deadline,
+            upstream="openai" if provider == "openai" else "anthropic",
+        )
     except Exception as e:
+        # The candidates are still useful without the LLM's take on them
         logger.error(f"Error calling LLM: {e}")
-        return jsonify({"error": f"Failed to get AI recommendation: {str(e)}"}), 500
+        result["partial"] = True
+        result["error"] = f"Failed to get AI recommendation: {str(e)}"
+        return jsonify(result)
 
     logger.info(f"Successfully generated recommendation for {symbol}")
 
-    return jsonify(
-        {
-            "symbol": symbol,
-            "recommendation": recommendation,
-            "candidates": candidates,
-            "position": position,
-            "currentPrice": underlying_price,
-        }
-    )
+    return jsonify(result)
 
 
 if __name__ == "__main__":
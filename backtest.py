@@ -0,0 +1,223 @@
+import itertools
+import os
+import sys
+
+import numpy as np
+
+from chain_archive import ChainArchive
+
+RANK_KEYS = ("weeklyPct", "annualizedPct", "otmPct", "bid")
+
+SECONDS_PER_DAY = 86400
+
+
+def param_grid(
+    delta_bands=((0.09, 0.2),),
+    dte_windows=((1, 14),),
+    rank_keys=("weeklyPct",),
+    roll_dtes=(0,),
+    roll_itm=(False,),
+):
+    """Every combination of the given policy settings, as a list of dicts.
+
+    roll_dte > 0 buys back and re-sells once the short call has that many
+    days left; roll_itm buys back and re-sells as soon as it goes in the money.
+    """
+    return [
+        {
+            "delta_min": delta[0],
+            "delta_max": delta[1],
+            "dte_min": dte[0],
+            "dte_max": dte[1],
+            "rank_key": key,
+            "roll_dte": roll_dte,
+            "roll_itm": itm,
+        }
+        for delta, dte, key, roll_dte, itm in itertools.product(
+            delta_bands, dte_windows, rank_keys, roll_dtes, roll_itm
+        )
+    ]
+
+
+def _metrics(calls, underlying):
+    """Per-row ranking scores, indexed like RANK_KEYS."""
+    bid = calls["bid"].astype(np.float64)
+    dte = np.maximum(calls["dte"], 1).astype(np.float64)
+    weekly = bid / underlying * (7 / dte) * 100
+    annualized = bid / underlying * (365 / dte) * 100
+    otm = (calls["strike"] - underlying) / underlying * 100
+    return np.stack([weekly, annualized, otm, bid])
+
+
+def run_backtest(quotes, calls, params):
+    """Replay covered-call policies over archived snapshots of one symbol.
+
+    Simulates one contract (100 shares) per policy. All policies advance
+    together, one snapshot at a time, with selection, rolls and assignment
+    computed as array operations across the whole parameter set. Returns one
+    result dict per entry in `params`.
+    """
+    n_params = len(params)
+    snap_ts = np.asarray(quotes["ts"])
+    snap_price = np.asarray(quotes["underlying"], dtype=np.float64)
+    # Older archives may hold two snapshots stamped the same second; their
+    # call rows can't be told apart, so replay that second once
+    first = np.ones(len(snap_ts), dtype=bool)
+    first[1:] = snap_ts[1:] != snap_ts[:-1]
+    snap_ts, snap_price = snap_ts[first], snap_price[first]
+    call_ts = np.asarray(calls["ts"])
+    starts = np.searchsorted(call_ts, snap_ts, side="left")
+    ends = np.searchsorted(call_ts, snap_ts, side="right")
+
+    # Underlying price for every call row, from the snapshot it belongs to
+    row_snap = np.clip(np.searchsorted(snap_ts, call_ts), 0, max(len(snap_ts) - 1, 0))
+    row_price = snap_price[row_snap] if len(snap_ts) else np.empty(0)
+    scores = (
+        _metrics(calls, row_price) if len(call_ts) else np.empty((len(RANK_KEYS), 0))
+    )
+    delta = np.asarray(calls["delta"], dtype=np.float64)
+    dte = np.asarray(calls["dte"])
+    bid = np.asarray(calls["bid"], dtype=np.float64)
+    ask = np.asarray(calls["ask"], dtype=np.float64)
+    strike = np.asarray(calls["strike"], dtype=np.float64)
+    exp = np.asarray(calls["exp_day"])
+    # Integer contract key (expiration, strike in cents) for buy-back lookups
+    contract = exp.astype(np.int64) * 10_000_000 + np.round(strike * 100).astype(
+        np.int64
+    )
+
+    delta_min = np.array([p["delta_min"] for p in params])[:, None]
+    delta_max = np.array([p["delta_max"] for p in params])[:, None]
+    dte_min = np.array([p["dte_min"] for p in params])[:, None]
+    dte_max = np.array([p["dte_max"] for p in params])[:, None]
+    rank = np.array([RANK_KEYS.index(p["rank_key"]) for p in params])
+    roll_dte = np.array([p["roll_dte"] for p in params])
+    roll_itm = np.array([p["roll_itm"] for p in params], dtype=bool)
+
+    is_open = np.zeros(n_params, dtype=bool)
+    open_strike = np.zeros(n_params)
+    open_exp = np.zeros(n_params, dtype=np.int64)
+    open_contract = np.zeros(n_params, dtype=np.int64)
+    premium = np.zeros(n_params)
+    buyback = np.zeros(n_params)
+    assignment_cost = np.zeros(n_params)
+    trades = np.zeros(n_params, dtype=np.int64)
+    expired = np.zeros(n_params, dtype=np.int64)
+    assignments = np.zeros(n_params, dtype=np.int64)
+    rolls = np.zeros(n_params, dtype=np.int64)
+    peak = np.full(n_params, -np.inf)
+    max_drawdown = np.zeros(n_params)
+    equity = np.zeros(n_params)
+
+    prev_price = snap_price[0] if len(snap_price) else 0.0
+    for t in range(len(snap_ts)):
+        price = snap_price[t]
+        today = snap_ts[t] // SECONDS_PER_DAY
+        a, b = starts[t], ends[t]
+
+        # Settle contracts that expired before today at the last price seen
+        settle = is_open & (open_exp < today)
+        called = settle & (prev_price > open_strike)
+        assignment_cost += np.where(called, (prev_price - open_strike) * 100, 0.0)
+        assignments += called
+        expired += settle
+        is_open &= ~settle
+
+        # Roll: buy back at the contract's current ask (intrinsic if unquoted)
+        days_left = open_exp - today
+        roll = is_open & (
+            ((roll_dte > 0) & (days_left <= roll_dte))
+            | (roll_itm & (price > open_strike))
+        )
+        if roll.any():
+            cost = np.maximum(price - open_strike, 0.0) * 100
+            if b > a:
+                order = np.argsort(contract[a:b])
+                keys = contract[a:b][order]
+                pos = np.minimum(np.searchsorted(keys, open_contract), len(keys) - 1)
+                quoted = ask[a:b][order][pos]
+                cost = np.where(keys[pos] == open_contract, quoted * 100, cost)
+            buyback += np.where(roll, cost, 0.0)
+            rolls += roll
+            is_open &= ~roll
+
+        # Sell a new call wherever no contract is open
+        need = ~is_open
+        if need.any() and b > a:
+            eligible = (
+                (delta[a:b] >= delta_min)
+                & (delta[a:b] <= delta_max)
+                & (dte[a:b] >= dte_min)
+                & (dte[a:b] <= dte_max)
+                & (dte[a:b] > roll_dte[:, None])
+                & (bid[a:b] > 0)
+            )
+            score = np.where(eligible, scores[rank, a:b], -np.inf)
+            best = np.argmax(score, axis=1)
+            sell = need & eligible[np.arange(n_params), best]
+            row = a + best
+            premium += np.where(sell, bid[row] * 100, 0.0)
+            open_strike = np.where(sell, strike[row], open_strike)
+            open_exp = np.where(sell, exp[row], open_exp)
+            open_contract = np.where(sell, contract[row], open_contract)
+            trades += sell
+            is_open |= sell
+
+        # Mark to market: stock P&L plus cash, less the short call's intrinsic value
+        liability = np.where(is_open, np.maximum(price - open_strike, 0.0) * 100, 0.0)
+        equity = (
+            (price - snap_price[0]) * 100
+            + premium
+            - buyback
+            - assignment_cost
+            - liability
+        )
+        peak = np.maximum(peak, equity)
+        max_drawdown = np.maximum(max_drawdown, peak - equity)
+        prev_price = price
+
+    stock_pnl = (snap_price[-1] - snap_price[0]) * 100 if len(snap_price) else 0.0
+    results = []
+    for i, p in enumerate(params):
+        results.append(
+            {
+                **p,
+                "premium": round(float(premium[i]), 2),
+                "buyback_cost": round(float(buyback[i]), 2),
+                "assignment_cost": round(float(assignment_cost[i]), 2),
+                "trades": int(trades[i]),
+                "rolls": int(rolls[i]),
+                "assignments": int(assignments[i]),
+                "assignment_rate": (
+                    round(float(assignments[i] / expired[i]), 4) if expired[i] else 0.0
+                ),
+                "max_drawdown": round(float(max_drawdown[i]), 2),
+                "pnl": round(float(equity[i]), 2),
+                "excess_pnl": round(float(equity[i] - stock_pnl), 2),
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    archive = ChainArchive(os.getenv("CHAIN_ARCHIVE_DIR", "data/chains"))
+    symbols = sys.argv[1:] or archive.symbols()
+    grid = param_grid(
+        delta_bands=[(0.05, 0.1), (0.09, 0.2), (0.1, 0.3), (0.2, 0.35)],
+        dte_windows=[(1, 7), (1, 14), (7, 14), (14, 45)],
+        rank_keys=RANK_KEYS,
+        roll_dtes=(0, 1, 3),
+        roll_itm=(False, True),
+    )
+    for symbol in symbols:
+        quotes, calls = archive.load(symbol)
+        results = run_backtest(quotes, calls, grid)
+        results.sort(key=lambda r: r["excess_pnl"], reverse=True)
+        print(f"{symbol}: {len(quotes['ts'])} snapshots, {len(grid)} policies")
+        for r in results[:5]:
+            print(
+                f"  delta {r['delta_min']}-{r['delta_max']}, dte {r['dte_min']}-{r['dte_max']}, "
+                f"rank {r['rank_key']}, roll_dte {r['roll_dte']}, roll_itm {r['roll_itm']}: "
+                f"premium ${r['premium']:.0f}, assigned {r['assignment_rate']:.0%}, "
+                f"max DD ${r['max_drawdown']:.0f}, excess ${r['excess_pnl']:.0f}"
+            )
@@ -0,0 +1,124 @@
+from bisect import bisect_left, bisect_right
+
+SORT_FIELDS = (
+    "weeklyPct",
+    "annualizedPct",
+    "otmPct",
+    "otmDollar",
+    "delta",
+    "dte",
+    "bid",
+    "strike",
+    "totalPremium",
+)
+
+
+def parse_sort(spec):
+    """Parse "-weeklyPct,delta" into [("weeklyPct", True), ("delta", False)]."""
+    sort = []
+    for part in spec.split(","):
+        part = part.strip()
+        if part:
+            sort.append((part.lstrip("-"), part.startswith("-")))
+    if not sort:
+        raise ValueError("Empty sort")
+    return sort
+
+
+class CandidateIndex:
+    """In-memory index of screened candidates across every holding.
+
+    Built once per recommendations snapshot. Each sortable field keeps its
+    candidates presorted, so range filters become bisects and a sorted page
+    only walks as far down the primary key as the page needs.
+    """
+
+    def __init__(self, candidates, version=0):
+        self.version = version
+        self._rows = list(candidates)
+        self._order = {}
+        self._values = {}
+        for field in SORT_FIELDS:
+            order = sorted(range(len(self._rows)), key=lambda i: self._rows[i][field])
+            self._order[field] = order
+            self._values[field] = [self._rows[i][field] for i in order]
+
+        self._by_symbol = {}
+        for i, row in enumerate(self._rows):
+            self._by_symbol.setdefault(row["symbol"], set()).add(i)
+
+    def rows(self, symbol):
+        """Every indexed candidate for `symbol`."""
+        return [self._rows[i] for i in sorted(self._by_symbol.get(symbol, ()))]
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _matching(self, ranges, symbols):
+        """Return the set of row ids passing every filter, or None for all rows."""
+        matching = None
+        if symbols:
+            matching = set()
+            for symbol in symbols:
+                matching |= self._by_symbol.get(symbol, set())
+
+        for field, (low, high) in ranges.items():
+            if field not in self._order:
+                raise ValueError(f"Unknown filter field: {field}")
+            values = self._values[field]
+            start = 0 if low is None else bisect_left(values, low)
+            end = len(values) if high is None else bisect_right(values, high)
+            ids = self._order[field][start:end]
+            matching = set(ids) if matching is None else matching.intersection(ids)
+
+        return matching
+
+    def query(
+        self, sort=(("weeklyPct", True),), ranges=None, symbols=None, offset=0, limit=20
+    ):
+        """Return one page of candidates.
+
+        `sort` is a sequence of (field, descending) pairs, `ranges` maps a
+        field to an inclusive (min, max) pair where either end may be None.
+        """
+        for field, _ in sort:
+            if field not in self._order:
+                raise ValueError(f"Unknown sort field: {field}")
+
+        matching = self._matching(ranges or {}, symbols)
+        total = len(self._rows) if matching is None else len(matching)
+        need = offset + limit
+
+        (primary, descending), rest = sort[0], sort[1:]
+        order = self._order[primary]
+        if descending:
+            order = reversed(order)
+
+        def tiebreak(i):
+            row = self._rows[i]
+            return tuple(-row[f] if desc else row[f] for f, desc in rest)
+
+        page = []
+        group = []
+        group_value = None
+        for i in order:
+            if matching is not None and i not in matching:
+                continue
+            value = self._rows[i][primary]
+            if group and value != group_value:
+                page.extend(sorted(group, key=tiebreak) if rest else group)
+                group = []
+                if len(page) >= need:
+                    break
+            group.append(i)
+            group_value = value
+        else:
+            page.extend(sorted(group, key=tiebreak) if rest else group)
+
+        return {
+            "version": self.version,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "candidates": [self._rows[i] for i in page[offset:need]],
+        }
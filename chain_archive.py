@@ -0,0 +1,148 @@
+import datetime
+import fcntl
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# One append-only file per column, so a backtest memory-maps only what it reads.
+QUOTE_COLUMNS = {"ts": "<i8", "underlying": "<f8"}
+CALL_COLUMNS = {
+    "ts": "<i8",
+    "exp_day": "<i4",
+    "dte": "<i2",
+    "strike": "<f4",
+    "delta": "<f4",
+    "bid": "<f4",
+    "ask": "<f4",
+}
+
+EPOCH = datetime.date(1970, 1, 1)
+
+
+def exp_day(exp_key):
+    """Days since the epoch for a callExpDateMap key like "2025-01-17:7"."""
+    return (datetime.date.fromisoformat(exp_key.split(":")[0]) - EPOCH).days
+
+
+def chain_columns(chain):
+    """Call columns for append(), from a chain_parser.parse_call_chain() result."""
+    days = [exp_day(key) for key in chain["expirations"]]
+    return {
+        "exp_day": [days[i] for i in chain["exp"]],
+        "dte": chain["dte"],
+        "strike": chain["strike"],
+        "delta": [abs(d) for d in chain["delta"]],
+        "bid": chain["bid"],
+        "ask": chain["ask"],
+    }
+
+
+class ChainArchive:
+    """Columnar, memory-mappable archive of option chain snapshots.
+
+    Layout: <root>/<SYMBOL>/quotes/<column> holds one row per snapshot
+    (timestamp, underlying price) and <root>/<SYMBOL>/calls/<column> one row
+    per call contract per snapshot. Rows are appended in time order.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _dir(self, symbol, table):
+        return os.path.join(self.root, symbol.replace("/", "_"), table)
+
+    def _repair(self, path, columns):
+        """Truncate every column to the shortest, so rows line up again.
+
+        A crash mid-append can leave some columns a row (or part of one)
+        longer than others; appending after that would misalign every later
+        row.
+        """
+        sizes = {}
+        for name, dtype in columns.items():
+            file = os.path.join(path, name)
+            sizes[file] = os.path.getsize(file) if os.path.exists(file) else 0
+        rows = min(
+            size // np.dtype(dtype).itemsize
+            for size, dtype in zip(sizes.values(), columns.values())
+        )
+        for (file, size), dtype in zip(sizes.items(), columns.values()):
+            if size != rows * np.dtype(dtype).itemsize:
+                logger.warning(f"Truncating torn archive column {file} to {rows} rows")
+                os.truncate(file, rows * np.dtype(dtype).itemsize)
+
+    def _append(self, path, columns, values):
+        os.makedirs(path, exist_ok=True)
+        for name, dtype in columns.items():
+            with open(os.path.join(path, name), "ab") as f:
+                f.write(np.asarray(values[name], dtype=dtype).tobytes())
+
+    def _last_ts(self, symbol):
+        path = os.path.join(self._dir(symbol, "quotes"), "ts")
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < 8:
+            return None
+        with open(path, "rb") as f:
+            f.seek(size - size % 8 - 8)
+            return int(np.frombuffer(f.read(8), dtype=QUOTE_COLUMNS["ts"])[0])
+
+    def append(self, symbol, ts, underlying, calls):
+        """Archive one snapshot: `calls` maps each non-ts call column to a sequence.
+
+        Snapshots must be strictly later than the last one archived for the
+        symbol; one stamped the same second or earlier (e.g. fetched by
+        another route or worker) is skipped. Returns whether it was archived.
+        """
+        n = len(calls["strike"])
+        symbol_dir = os.path.dirname(self._dir(symbol, "quotes"))
+        os.makedirs(symbol_dir, exist_ok=True)
+        # File lock so worker processes sharing the archive never interleave columns
+        with open(os.path.join(symbol_dir, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._repair(self._dir(symbol, "quotes"), QUOTE_COLUMNS)
+            self._repair(self._dir(symbol, "calls"), CALL_COLUMNS)
+            last_ts = self._last_ts(symbol)
+            if last_ts is not None and ts <= last_ts:
+                return False
+            self._append(
+                self._dir(symbol, "quotes"),
+                QUOTE_COLUMNS,
+                {"ts": [ts], "underlying": [underlying]},
+            )
+            self._append(
+                self._dir(symbol, "calls"),
+                CALL_COLUMNS,
+                {"ts": np.full(n, ts), **calls},
+            )
+            return True
+
+    def _load(self, path, columns):
+        arrays = {}
+        for name, dtype in columns.items():
+            file = os.path.join(path, name)
+            size = os.path.getsize(file) if os.path.exists(file) else 0
+            if size:
+                arrays[name] = np.memmap(file, dtype=dtype, mode="r")
+            else:
+                arrays[name] = np.empty(0, dtype=dtype)
+        # A crash mid-append can leave columns of different lengths
+        n = min(len(a) for a in arrays.values())
+        return {name: a[:n] for name, a in arrays.items()}
+
+    def load(self, symbol):
+        """Return (quotes, calls), each a dict of memory-mapped column arrays."""
+        quotes = self._load(self._dir(symbol, "quotes"), QUOTE_COLUMNS)
+        calls = self._load(self._dir(symbol, "calls"), CALL_COLUMNS)
+        return quotes, calls
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name
+            for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name))
+        )
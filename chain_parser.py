@@ -0,0 +1,95 @@
+import re
+from array import array
+
+# Only these fields of each call are ever read. Scanning the raw bytes for
+# them (plus the expiration keys of callExpDateMap) avoids building a dict
+# for every contract, greek and description string in the payload.
+_TOKEN = re.compile(
+    rb'"(\d{4}-\d\d-\d\d:\d+)"\s*:\s*\{'
+    rb'|"(strikePrice|delta|daysToExpiration|bid|ask)"\s*:\s*([^,}\]\s]*)'
+)
+_UNDERLYING_PRICE = re.compile(rb'"underlyingPrice"\s*:\s*([^,}\]\s]*)')
+
+_FIELDS = {
+    b"strikePrice": "strike",
+    b"delta": "delta",
+    b"daysToExpiration": "dte",
+    b"bid": "bid",
+    b"ask": "ask",
+}
+
+
+def _number(raw):
+    try:
+        return float(raw)
+    except ValueError:
+        return 0.0
+
+
+def parse_call_chain(payload):
+    """Extract the calls from a raw option_chains response body.
+
+    Returns a dict of compact columns, one entry per call contract:
+    "exp" indexes into "expirations" (the callExpDateMap keys, e.g.
+    "2025-01-17:7"), and "strike", "delta", "dte", "bid", "ask" are arrays.
+    Memory and time grow with the number of calls, not the payload size.
+    """
+    chain = {
+        "underlyingPrice": 0.0,
+        "expirations": [],
+        "exp": array("i"),
+        "strike": array("d"),
+        "delta": array("d"),
+        "dte": array("i"),
+        "bid": array("d"),
+        "ask": array("d"),
+    }
+
+    match = _UNDERLYING_PRICE.search(payload)
+    if match:
+        chain["underlyingPrice"] = _number(match.group(1))
+
+    start = payload.find(b'"callExpDateMap"')
+    if start < 0:
+        return chain
+    end = payload.find(b'"putExpDateMap"')
+    if end < start:
+        end = len(payload)
+
+    current = {}
+    exp_index = -1
+    last_key = None
+
+    def flush():
+        # Like reading options[0], keep only the first contract per strike
+        nonlocal last_key
+        if "strike" not in current:
+            return
+        key = (exp_index, current["strike"])
+        if key != last_key:
+            chain["exp"].append(exp_index)
+            chain["strike"].append(current["strike"])
+            chain["delta"].append(current.get("delta", 0.0))
+            chain["dte"].append(int(current.get("dte", 0)))
+            chain["bid"].append(current.get("bid", 0.0))
+            chain["ask"].append(current.get("ask", 0.0))
+            last_key = key
+
+    for match in _TOKEN.finditer(payload, start, end):
+        exp_key, field, raw = match.groups()
+        if exp_key:
+            flush()
+            current.clear()
+            exp_index = len(chain["expirations"])
+            chain["expirations"].append(exp_key.decode())
+            continue
+
+        name = _FIELDS[field]
+        if name in current:
+            # Each contract has each field once, so a repeat starts the next one
+            flush()
+            current.clear()
+        current[name] = _number(raw)
+
+    flush()
+    return chain
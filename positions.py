@@ -0,0 +1,81 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_accounts(client):
+    """Return the securitiesAccount of every linked account, with positions.
+
+    Uses the bulk all-accounts endpoint (one upstream call regardless of how
+    many accounts are linked) and falls back to parallel per-account calls.
+    """
+    try:
+        accounts = client.account_details_all(fields="positions").json()
+        if isinstance(accounts, list):
+            return [a["securitiesAccount"] for a in accounts]
+        logger.warning(f"Unexpected all-accounts response: {accounts}")
+    except Exception as e:
+        logger.warning(f"Bulk account fetch failed, using per-account calls: {e}")
+
+    linked = client.account_linked().json()
+    if not linked:
+        return []
+
+    def fetch_one(account):
+        return client.account_details(account["hashValue"], fields="positions").json()
+
+    with ThreadPoolExecutor(max_workers=len(linked)) as pool:
+        results = list(pool.map(fetch_one, linked))
+
+    return [r["securitiesAccount"] for r in results]
+
+
+def merge_holdings(accounts):
+    """Merge equity positions across accounts into one entry per symbol.
+
+    Covered calls can't span accounts, so contracts are counted per account
+    (whole lots of 100 in each) and broken down under "accounts", keyed by
+    the last four digits of the account number. "shares" counts only those
+    whole lots; "totalShares" is the full quantity held.
+    """
+    holdings = {}
+    for account in accounts:
+        account_id = str(account.get("accountNumber", ""))[-4:]
+        for pos in account.get("positions", []):
+            if pos["instrument"]["assetType"] != "EQUITY":
+                continue
+
+            symbol = pos["instrument"]["symbol"]
+            quantity = int(pos["longQuantity"])
+            if quantity <= 0:
+                continue
+
+            entry = holdings.setdefault(
+                symbol,
+                {
+                    "shares": 0,
+                    "contracts": 0,
+                    "quantity": 0,
+                    "cost": 0.0,
+                    "marketValue": 0.0,
+                    "gainLoss": 0.0,
+                    "accounts": {},
+                },
+            )
+            contracts = quantity // 100
+            entry["shares"] += contracts * 100
+            entry["contracts"] += contracts
+            entry["quantity"] += quantity
+            entry["cost"] += pos["averagePrice"] * quantity
+            entry["marketValue"] += pos["marketValue"]
+            entry["gainLoss"] += pos["longOpenProfitLoss"]
+            if contracts:
+                accts = entry["accounts"]
+                accts[account_id] = accts.get(account_id, 0) + contracts
+
+    for entry in holdings.values():
+        entry["totalShares"] = entry.pop("quantity")
+        entry["avgPrice"] = entry.pop("cost") / entry["totalShares"]
+
+    return holdings
@@ -0,0 +1,138 @@
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+
+def _stack(frame):
+    """Collapse a frame's call stack to "root;...;leaf" for flame graphs."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(
+            f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        )
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Sampler:
+    """Samples the stacks of registered threads from one background thread.
+
+    Each registered thread gets a Counter of collapsed stacks. Sampling only
+    reads frames, so a request being profiled runs its normal code path.
+    Work the thread hands to a pool via wrap() is sampled into its Counter too.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._active = {}
+        self._helpers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, thread_id):
+        with self._lock:
+            self._active[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="profile-sampler", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, thread_id):
+        """Stop sampling `thread_id` and return its stack counts."""
+        with self._lock:
+            for helper, owner in list(self._helpers.items()):
+                if owner == thread_id:
+                    del self._helpers[helper]
+            return self._active.pop(thread_id, Counter())
+
+    def _owner(self, thread_id):
+        if thread_id in self._active:
+            return thread_id
+        return self._helpers.get(thread_id)
+
+    def wrap(self, fn):
+        """Return fn, sampled into the calling thread's profile on whichever thread runs it.
+
+        Returns fn unchanged when the calling thread isn't being profiled.
+        """
+        with self._lock:
+            owner = self._owner(threading.get_ident())
+        if owner is None:
+            return fn
+
+        def run(*args, **kwargs):
+            thread_id = threading.get_ident()
+            with self._lock:
+                attached = owner in self._active and thread_id not in self._active
+                if attached:
+                    self._helpers[thread_id] = owner
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if attached:
+                    with self._lock:
+                        if self._helpers.get(thread_id) == owner:
+                            del self._helpers[thread_id]
+
+        return run
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+                active += [
+                    (helper, self._active[owner])
+                    for helper, owner in self._helpers.items()
+                ]
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, counts in active:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    counts[_stack(frame)] += 1
+
+
+def collapsed(counts):
+    """Brendan Gregg's folded format, readable by flamegraph.pl and speedscope."""
+    return "\n".join(f"{stack} {n}" for stack, n in counts.most_common()) + "\n"
+
+
+class ProfileStore:
+    """Bounded ring buffer of captured request profiles."""
+
+    def __init__(self, size=20):
+        self._profiles = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, counts, **info):
+        with self._lock:
+            profile = {
+                "id": next(self._ids),
+                "samples": sum(counts.values()),
+                **info,
+                "stacks": collapsed(counts),
+            }
+            self._profiles.append(profile)
+            return profile["id"]
+
+    def list(self):
+        with self._lock:
+            return [
+                {k: v for k, v in p.items() if k != "stacks"}
+                for p in reversed(self._profiles)
+            ]
+
+    def get(self, profile_id):
+        with self._lock:
+            for p in self._profiles:
+                if p["id"] == profile_id:
+                    return p
+        return None
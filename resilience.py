@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Upstream calls run here so a caller can stop waiting when its budget is spent
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="upstream")
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class Deadline:
+    """An overall time budget, handed down to every upstream call of a request."""
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+class CircuitBreaker:
+    """Short-circuits an upstream after repeated failures.
+
+    After `threshold` consecutive failures the circuit opens and calls fail
+    immediately for `reset_after` seconds. Then one trial call is let through:
+    success closes the circuit, failure opens it again.
+
+    allow() returns a token for each call it lets through (None when it
+    refuses); a call that never reaches upstream hands it to release().
+    """
+
+    def __init__(self, name, threshold=5, reset_after=30):
+        self.name = name
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at = None
+        self._trial = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.reset_after:
+                return None
+            self._trial = object()
+            return self._trial
+
+    def release(self, token):
+        """Give back a call allowed with `token` that never reached upstream.
+
+        Only frees the half-open trial if `token` is the one that took it.
+        """
+        with self._lock:
+            if token is not None and token is self._trial:
+                self._trial = None
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                if self._opened_at is None or self._trial:
+                    logger.warning(
+                        f"Circuit for {self.name} opened after {self._failures} failures"
+                    )
+                self._opened_at = time.monotonic()
+                self._trial = None
+
+
+def is_upstream_failure(exc):
+    """Whether `exc` says the upstream is unhealthy, as opposed to a bad request.
+
+    HTTP errors count only for 5xx and 429. requests' HTTPError carries the
+    status on .response, the LLM SDKs' status errors on .status_code.
+    Anything without a status (transport errors, timeouts) counts.
+    """
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if not isinstance(status, int):
+        return True
+    return status >= 500 or status == 429
+
+
+def call_with_deadline(fn, deadline=None, breaker=None):
+    """Call fn(), giving up once `deadline` is spent.
+
+    Raises CircuitOpen without calling when `breaker` is open, and
+    DeadlineExceeded when the budget runs out first. A call still queued for
+    a worker is cancelled; one already in flight is left to finish in the
+    background. Timeouts and upstream failures (see is_upstream_failure) of
+    calls that reached upstream count against `breaker`; client errors like
+    a 400 for an unknown symbol don't.
+    """
+    token = breaker.allow() if breaker else None
+    if breaker and not token:
+        raise CircuitOpen(f"{breaker.name} is unavailable (circuit open)")
+    if deadline and deadline.expired():
+        if breaker:
+            breaker.release(token)
+        raise DeadlineExceeded("Deadline exceeded before the call started")
+
+    future = None
+    try:
+        if deadline is None:
+            result = fn()
+        else:
+            future = _pool.submit(fn)
+            result = future.result(timeout=deadline.remaining())
+    except FutureTimeoutError:
+        if future is None or future.done():
+            # fn raised TimeoutError itself
+            if breaker:
+                breaker.record_failure()
+            raise
+        if future.cancel():
+            # Never started: our own pool was busy, not the upstream
+            if breaker:
+                breaker.release(token)
+            raise DeadlineExceeded("Deadline exceeded waiting for a free worker")
+        if breaker:
+            breaker.record_failure()
+        raise DeadlineExceeded("Deadline exceeded waiting for upstream")
+    except Exception as e:
+        if breaker:
+            if is_upstream_failure(e):
+                breaker.record_failure()
+            else:
+                # Upstream answered, so it's healthy
+                breaker.record_success()
+        raise
+
+    if breaker:
+        breaker.record_success()
+    return result
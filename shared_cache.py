@@ -0,0 +1,150 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+def _encode(value):
+    # Parsed option chains hold compact arrays; they come back as lists
+    if isinstance(value, array):
+        return value.tolist()
+    raise TypeError(f"Cannot cache {type(value).__name__}")
+
+
+class SharedCache:
+    """JSON cache shared by every process on the host.
+
+    Backed by SQLite in WAL mode, so readers in different worker processes
+    don't block each other. get_or_load() takes a per-key file lock so only
+    one process (or thread) calls upstream for a given key at a time; the
+    rest wait and then read what it stored.
+    """
+
+    PRUNE_EVERY = 100
+    KEEP_EXPIRED = 24 * 3600
+    # Keys share a fixed set of lock files, so the lock dir doesn't grow
+    LOCK_STRIPES = 256
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_dir = f"{path}.locks"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        # Often created at import, before workers fork, so don't keep this
+        # connection around: SQLite handles must not cross a fork
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # One connection per thread, opened lazily in the process that uses it
+        pid, conn = getattr(self._local, "conn", (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = (os.getpid(), conn)
+        return conn
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired."""
+        row = (
+            self._connect()
+            .execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def get_stale(self, key):
+        """Return (value, stored_at) even if expired, or None. For stale-if-error."""
+        row = (
+            self._connect()
+            .execute("SELECT value, stored_at FROM cache WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, stored_at, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, default=_encode), now, now + ttl),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM cache WHERE expires_at < ?",
+                    (now - self.KEEP_EXPIRED,),
+                )
+
+    @contextmanager
+    def lock(self, key, timeout=None):
+        """Exclusive lock on `key` across processes and threads.
+
+        Keys are hashed onto LOCK_STRIPES lock files, so unrelated keys
+        occasionally wait on each other. Raises TimeoutError if it can't be
+        taken within `timeout` seconds.
+        """
+        stripe = int(hashlib.sha1(key.encode()).hexdigest(), 16) % self.LOCK_STRIPES
+        with open(os.path.join(self.lock_dir, str(stripe)), "w") as f:
+            if timeout is None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                give_up_at = time.monotonic() + timeout
+                while True:
+                    try:
+                        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= give_up_at:
+                            raise TimeoutError(f"Timed out waiting for {key}")
+                        time.sleep(0.01)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get_or_load(self, key, ttl, loader, timeout=None):
+        """Return the cached value, calling loader() at most once host-wide on a miss."""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self.lock(key, timeout):
+            # Another process may have loaded it while we waited
+            value = self.get(key)
+            if value is not None:
+                return value
+
+            logger.info(f"Cache miss for {key}")
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl)
+            return value
@@ -0,0 +1,107 @@
+import threading
+import time
+
+
+class RecommendationSnapshot:
+    """Versioned copy of the latest recommendations, for delta responses.
+
+    Every update that changes anything bumps the version. Versions are
+    millisecond timestamps (kept strictly increasing) so a client holding a
+    version from before a restart never collides with a new one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self._first_version = None
+        self._recs = {}
+        self._changed_at = {}
+        self._removed_at = {}
+
+    def state(self):
+        """JSON-safe copy of the snapshot, so other processes can restore it."""
+        with self._lock:
+            return {
+                "version": self.version,
+                "first_version": self._first_version,
+                "recs": self._recs,
+                "changed_at": self._changed_at,
+                "removed_at": self._removed_at,
+            }
+
+    @classmethod
+    def from_state(cls, state):
+        snapshot = cls()
+        snapshot.version = state["version"]
+        snapshot._first_version = state["first_version"]
+        snapshot._recs = state["recs"]
+        snapshot._changed_at = state["changed_at"]
+        snapshot._removed_at = state["removed_at"]
+        return snapshot
+
+    def _next_version(self):
+        return max(self.version + 1, int(time.time() * 1000))
+
+    def update(self, recommendations):
+        """Replace the snapshot, recording which tickers changed. Returns the version."""
+        with self._lock:
+            changed = [
+                ticker
+                for ticker, rec in recommendations.items()
+                if self._recs.get(ticker) != rec
+            ]
+            removed = [ticker for ticker in self._recs if ticker not in recommendations]
+            if not changed and not removed:
+                return self.version
+
+            version = self._next_version()
+            for ticker in changed:
+                self._changed_at[ticker] = version
+                self._removed_at.pop(ticker, None)
+            for ticker in removed:
+                self._changed_at.pop(ticker, None)
+                self._removed_at[ticker] = version
+
+            self._recs = dict(recommendations)
+            self.version = version
+            if self._first_version is None:
+                self._first_version = version
+            return version
+
+    def get(self, ticker):
+        with self._lock:
+            return self._recs.get(ticker)
+
+    def delta(self, since=None):
+        """Return tickers changed or removed after `since`.
+
+        Falls back to the full payload when `since` is missing or isn't a
+        version this snapshot has issued.
+        """
+        with self._lock:
+            if (
+                since is None
+                or self._first_version is None
+                or not self._first_version <= since <= self.version
+            ):
+                return {
+                    "version": self.version,
+                    "full": True,
+                    "changed": dict(self._recs),
+                    "removed": [],
+                }
+
+            return {
+                "version": self.version,
+                "full": False,
+                "changed": {
+                    ticker: self._recs[ticker]
+                    for ticker, version in self._changed_at.items()
+                    if version > since
+                },
+                "removed": [
+                    ticker
+                    for ticker, version in self._removed_at.items()
+                    if version > since
+                ],
+            }
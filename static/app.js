@@ -1,7 +1,8 @@
 // State
 let currentSymbol = "NVDA";
 let currentType = "line";
-let currentPeriod = "5d";
+const DEFAULT_PERIOD = "5d";
+let currentPeriod = DEFAULT_PERIOD;
 let rawData = [];
 let recsData = {};
 let sortState = {};
@@ -75,14 +76,12 @@ function handleCrosshairMove(param) {
   }
 }
 
-// Smooth resize - just recreate chart with existing data
+// Smooth resize - keep the chart and its series, just change the width
 let resizeTimeout;
 window.addEventListener("resize", () => {
   clearTimeout(resizeTimeout);
   resizeTimeout = setTimeout(() => {
-    candleSeries = null;
-    lineSeries = null;
-    createChart();
+    chart.resize(chartContainer.clientWidth, 500);
   }, 100);
 });
 
@@ -142,38 +141,211 @@ function setPeriod(period) {
   loadChart(currentSymbol);
 }
 
+// Candle cache: in memory, persisted to IndexedDB across reloads.
+// Cached candles render immediately and are revalidated in the background
+// once older than the server's own cache TTL.
+const PERIODS = ["1d", "5d", "1m", "6m", "1y", "5y"];
+const CANDLES_MAX_AGE_MS = 60000;
+const candleCache = new Map();
+const candleRequests = new Map();
+let candleDb = null;
+
+function openCandleDb() {
+  if (!candleDb) {
+    candleDb = new Promise((resolve) => {
+      if (!window.indexedDB) {
+        resolve(null);
+        return;
+      }
+      const request = indexedDB.open("options-ai", 1);
+      request.onupgradeneeded = () => request.result.createObjectStore("candles");
+      request.onsuccess = () => resolve(request.result);
+      // Private browsing or blocked storage - fall back to memory only
+      request.onerror = () => resolve(null);
+      request.onblocked = () => resolve(null);
+    });
+  }
+  return candleDb;
+}
+
+async function readCachedCandles(key) {
+  if (candleCache.has(key)) {
+    return candleCache.get(key);
+  }
+
+  const db = await openCandleDb();
+  if (!db) return null;
+
+  const entry = await new Promise((resolve) => {
+    const request = db.transaction("candles").objectStore("candles").get(key);
+    request.onsuccess = () => resolve(request.result || null);
+    request.onerror = () => resolve(null);
+  });
+  // A fetch may have landed while we were reading
+  if (entry && !candleCache.has(key)) {
+    candleCache.set(key, entry);
+  }
+  return candleCache.get(key) || null;
+}
+
+async function writeCachedCandles(key, entry) {
+  candleCache.set(key, entry);
+
+  const db = await openCandleDb();
+  if (!db) return;
+
+  try {
+    db.transaction("candles", "readwrite").objectStore("candles").put(entry, key);
+  } catch (error) {
+    console.error("Candle cache write error:", error);
+  }
+}
+
+function isFresh(entry) {
+  return entry && Date.now() - entry.fetchedAt < CANDLES_MAX_AGE_MS;
+}
+
+// Fetch from the server, sharing one request per symbol and period
+function fetchCandles(symbol, period) {
+  const key = `${symbol}:${period}`;
+  if (!candleRequests.has(key)) {
+    const request = (async () => {
+      const response = await fetch(`/api/candles/${symbol}?period=${period}`);
+
+      if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.error || "Failed to load chart");
+      }
+
+      // The server may have answered with last-known-good data
+      const staleAge = Number(response.headers.get("X-Stale-Age")) || 0;
+      const entry = {
+        data: await response.json(),
+        fetchedAt: Date.now() - staleAge * 1000,
+      };
+      await writeCachedCandles(key, entry);
+      return entry;
+    })();
+    candleRequests.set(key, request);
+    // Callers handle errors; this derived promise would only report them twice
+    request.finally(() => candleRequests.delete(key)).catch(() => {});
+  }
+  return candleRequests.get(key);
+}
+
+function sameCandles(a, b) {
+  if (a.length !== b.length) return false;
+  if (!a.length) return true;
+  const lastA = a[a.length - 1];
+  const lastB = b[b.length - 1];
+  return (
+    lastA.time === lastB.time &&
+    lastA.close === lastB.close &&
+    lastA.high === lastB.high &&
+    lastA.low === lastB.low
+  );
+}
+
+function showCandles(data) {
+  rawData = data;
+  renderData();
+  updateStats();
+}
+
 // Load chart data
 async function loadChart(symbol) {
   currentSymbol = symbol;
+  const period = currentPeriod;
+  const isCurrent = () => currentSymbol === symbol && currentPeriod === period;
   document.querySelector("h1").textContent = symbol;
 
   document.querySelectorAll(".symbols button").forEach((btn) => {
-    btn.classList.toggle("active", btn.textContent === symbol);
+    btn.classList.toggle("active", btn.textContent.trim() === symbol);
   });
 
-  document.getElementById("chart-loading").style.display = "flex";
+  const cachedEntry = await readCachedCandles(`${symbol}:${period}`);
+  if (!isCurrent()) return;
 
-  try {
-    const response = await fetch(
-      `/api/candles/${symbol}?period=${currentPeriod}`,
-    );
+  if (cachedEntry) {
+    showCandles(cachedEntry.data);
+  } else {
+    document.getElementById("chart-loading").style.display = "flex";
+  }
 
-    if (!response.ok) {
-      const error = await response.json();
-      throw new Error(error.error || "Failed to load chart");
+  try {
+    if (!isFresh(cachedEntry)) {
+      const entry = await fetchCandles(symbol, period);
+      const unchanged =
+        cachedEntry && sameCandles(cachedEntry.data, entry.data);
+      if (isCurrent() && !unchanged) {
+        showCandles(entry.data);
+      }
     }
-
-    rawData = await response.json();
-    renderData();
-    updateStats();
   } catch (error) {
     console.error("Chart error:", error);
-    document.getElementById("stats").innerHTML = `
-      <span style="color: #ef5350;">Error: ${error.message}</span>
-    `;
+    // Keep showing cached candles if we have them
+    if (isCurrent() && !cachedEntry) {
+      document.getElementById("stats").innerHTML = `
+        <span style="color: #ef5350;">Error: ${error.message}</span>
+      `;
+    }
   } finally {
-    document.getElementById("chart-loading").style.display = "none";
+    if (isCurrent()) {
+      document.getElementById("chart-loading").style.display = "none";
+      schedulePrefetch();
+    }
+  }
+}
+
+// While idle, warm the cache with what is likely to be clicked next:
+// the neighbouring periods of this symbol, then the default period of
+// every other symbol.
+let prefetchQueue = [];
+let prefetchScheduled = false;
+
+function whenIdle(callback) {
+  if (window.requestIdleCallback) {
+    requestIdleCallback(callback);
+  } else {
+    setTimeout(callback, 200);
+  }
+}
+
+function schedulePrefetch() {
+  const index = PERIODS.indexOf(currentPeriod);
+  prefetchQueue = [PERIODS[index - 1], PERIODS[index + 1]]
+    .filter(Boolean)
+    .map((period) => [currentSymbol, period]);
+
+  document.querySelectorAll(".symbols button").forEach((btn) => {
+    const symbol = btn.textContent.trim();
+    if (symbol !== currentSymbol) {
+      prefetchQueue.push([symbol, DEFAULT_PERIOD]);
+    }
+  });
+
+  if (!prefetchScheduled) {
+    prefetchScheduled = true;
+    whenIdle(prefetchNext);
+  }
+}
+
+async function prefetchNext() {
+  const next = prefetchQueue.shift();
+  if (!next) {
+    prefetchScheduled = false;
+    return;
+  }
+
+  const [symbol, period] = next;
+  try {
+    if (!isFresh(await readCachedCandles(`${symbol}:${period}`))) {
+      await fetchCandles(symbol, period);
+    }
+  } catch (error) {
+    console.error(`Prefetch error for ${symbol} ${period}:`, error);
   }
+  whenIdle(prefetchNext);
 }
 
 // Update stats
@@ -210,20 +382,16 @@ function updateStats() {
 }
 
 // Recommendations
+let recsVersion = null;
+const RECS_REFRESH_MS = 60000;
+
 async function loadRecommendations() {
   document.getElementById("recs-container").innerHTML =
     '<div class="loading"><div class="spinner"></div>Loading recommendations...</div>';
+  recsVersion = null;
 
   try {
-    const response = await fetch("/api/recommendations");
-
-    if (!response.ok) {
-      const error = await response.json();
-      throw new Error(error.error || "Failed to load recommendations");
-    }
-
-    recsData = await response.json();
-    renderRecommendations();
+    await refreshRecommendations();
   } catch (error) {
     console.error("Recommendations error:", error);
     document.getElementById("recs-container").innerHTML = `
@@ -232,41 +400,127 @@ async function loadRecommendations() {
   }
 }
 
-function renderRecommendations() {
-  let html = "";
-
-  for (const [ticker, rec] of Object.entries(recsData)) {
-    const gainLossClass = rec.info.gainLoss >= 0 ? "positive" : "negative";
-    const gainLossSign = rec.info.gainLoss >= 0 ? "+" : "";
-
-    // Sort candidates
-    let candidates = [...rec.candidates];
-    if (sortState[ticker]) {
-      const { column, ascending } = sortState[ticker];
-      candidates.sort((a, b) => {
-        const aVal = a[column];
-        const bVal = b[column];
-        return ascending ? aVal - bVal : bVal - aVal;
-      });
+// Fetch only what changed since the last version we rendered
+async function refreshRecommendations() {
+  let url = "/api/recommendations";
+  if (recsVersion !== null) {
+    url += `?since=${recsVersion}`;
+  }
+
+  const response = await fetch(url);
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.error || "Failed to load recommendations");
+  }
+
+  applyRecommendationsDelta(await response.json());
+}
+
+function applyRecommendationsDelta(delta) {
+  if (delta.full) {
+    recsData = delta.changed;
+    renderRecommendations();
+  } else {
+    const container = document.getElementById("recs-container");
+
+    for (const ticker of delta.removed) {
+      delete recsData[ticker];
+      document.getElementById(`rec-${ticker}`)?.remove();
     }
 
-    const arrow = (col) => {
-      if (sortState[ticker]?.column === col) {
-        return sortState[ticker].ascending ? " ▲" : " ▼";
+    for (const [ticker, rec] of Object.entries(delta.changed)) {
+      const isNew = !(ticker in recsData);
+      recsData[ticker] = rec;
+      if (isNew) {
+        container.insertAdjacentHTML("beforeend", renderTicker(ticker));
+      } else {
+        document.getElementById(`rec-info-${ticker}`).innerHTML =
+          renderPositionInfo(ticker);
+        document.getElementById(`rec-table-${ticker}`).innerHTML =
+          renderCandidatesTable(ticker);
       }
-      return " ⠀";
-    };
+    }
+  }
 
-    html += `
+  recsVersion = delta.version;
+  document.getElementById("recs-status").textContent = describeFreshness(delta);
+}
+
+// Explain when the server fell back to partial or last-known-good data
+function describeFreshness(data) {
+  const notes = Object.entries(data.stale || {}).map(
+    ([source, age]) => `${source} is ${Math.round(age)}s old`,
+  );
+  if (data.missing?.length) {
+    notes.push(`couldn't refresh ${data.missing.join(", ")}`);
+  }
+  return notes.length ? `Showing saved data: ${notes.join("; ")}` : "";
+}
+
+function renderRecommendations() {
+  document.getElementById("recs-container").innerHTML = Object.keys(recsData)
+    .map(renderTicker)
+    .join("");
+}
+
+function renderTicker(ticker) {
+  return `
+        <div id="rec-${ticker}">
             <div class="ticker-header">${ticker}</div>
             <div class="position-info">
-                ${rec.info.shares} shares @ $${rec.info.avgPrice.toFixed(2)} | 
-                Current: $${rec.price.toFixed(2)} | 
-                P/L: <span class="${gainLossClass}">${gainLossSign}$${rec.info.gainLoss.toFixed(0)}</span> |
-                ${rec.contracts} contracts available
+                <span id="rec-info-${ticker}">${renderPositionInfo(ticker)}</span>
                 <button id="rec-btn-${ticker}" class="rec-button" onclick="getRecommendation('${ticker}')">Get Recommendation</button>
             </div>
             <div id="rec-result-${ticker}" class="rec-result"></div>
+            <div id="rec-table-${ticker}">${renderCandidatesTable(ticker)}</div>
+        </div>
+    `;
+}
+
+function renderPositionInfo(ticker) {
+  const rec = recsData[ticker];
+  const gainLossClass = rec.info.gainLoss >= 0 ? "positive" : "negative";
+  const gainLossSign = rec.info.gainLoss >= 0 ? "+" : "";
+  const accounts = Object.entries(rec.info.accounts || {});
+  const accountBreakdown =
+    accounts.length > 1
+      ? ` (${accounts.map(([id, n]) => `…${id}: ${n}`).join(", ")})`
+      : "";
+
+  return `
+                ${rec.info.shares} shares @ $${rec.info.avgPrice.toFixed(2)} | 
+                Current: $${rec.price.toFixed(2)} | 
+                P/L: <span class="${gainLossClass}">${gainLossSign}$${rec.info.gainLoss.toFixed(0)}</span> |
+                ${rec.contracts} contracts available${accountBreakdown}
+    `;
+}
+
+function renderCandidatesTable(ticker) {
+  const rec = recsData[ticker];
+
+  // Sort candidates
+  let candidates = [...rec.candidates];
+  if (sortState[ticker]) {
+    const { column, ascending } = sortState[ticker];
+    candidates.sort((a, b) => {
+      const aVal = a[column];
+      const bVal = b[column];
+      if (typeof aVal === "string") {
+        return ascending ? aVal.localeCompare(bVal) : bVal.localeCompare(aVal);
+      }
+      return ascending ? aVal - bVal : bVal - aVal;
+    });
+  }
+
+  const arrow = (col) => {
+    if (sortState[ticker]?.column === col) {
+      return sortState[ticker].ascending ? " ▲" : " ▼";
+    }
+    return " ⠀";
+  };
+
+  let html = `
             <table>
                 <thead>
                     <tr>
@@ -285,8 +539,8 @@ function renderRecommendations() {
                 <tbody>
         `;
 
-    for (const c of candidates) {
-      html += `
+  for (const c of candidates) {
+    html += `
                 <tr>
                     <td>$${c.strike}</td>
                     <td>$${c.otmDollar}</td>
@@ -300,12 +554,17 @@ function renderRecommendations() {
                     <td>$${c.totalPremium}</td>
                 </tr>
             `;
-    }
-
-    html += "</tbody></table>";
   }
 
-  document.getElementById("recs-container").innerHTML = html;
+  return html + "</tbody></table>";
+}
+
+function sortCandidates(ticker, column) {
+  const ascending =
+    sortState[ticker]?.column === column ? !sortState[ticker].ascending : false;
+  sortState[ticker] = { column, ascending };
+  document.getElementById(`rec-table-${ticker}`).innerHTML =
+    renderCandidatesTable(ticker);
 }
 
 function setProvider(provider, model = "") {
@@ -347,7 +606,11 @@ async function getRecommendation(ticker) {
     }
 
     const data = await response.json();
-    container.innerHTML = `<div class="recommendation">${data.recommendation.replace(/\n/g, "<br>").replace(/\*\*(.*?)\*\*/g, "<strong>$1</strong>")}</div>`;
+    if (data.recommendation === null) {
+      throw new Error(data.error || "Failed to get recommendation");
+    }
+    const freshness = describeFreshness(data);
+    container.innerHTML = `<div class="recommendation">${data.recommendation.replace(/\n/g, "<br>").replace(/\*\*(.*?)\*\*/g, "<strong>$1</strong>")}</div>${freshness ? `<div class="recs-status">${freshness}</div>` : ""}`;
   } catch (error) {
     console.error("Recommendation error:", error);
     container.innerHTML = `<div class="recommendation" style="border-left-color: #ef5350;">Error: ${error.message}</div>`;
@@ -361,3 +624,8 @@ async function getRecommendation(ticker) {
 createChart();
 loadChart("NVDA");
 loadRecommendations();
+setInterval(() => {
+  refreshRecommendations().catch((error) =>
+    console.error("Recommendations refresh error:", error),
+  );
+}, RECS_REFRESH_MS);
@@ -0,0 +1,217 @@
+import pytest
+import numpy as np
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chain_archive import ChainArchive, chain_columns, exp_day
+from backtest import param_grid, run_backtest, RANK_KEYS
+
+DAY = 86400
+
+
+def make_calls(expiration, dte, strikes, deltas, bids, asks=None):
+    n = len(strikes)
+    return {
+        "exp_day": [expiration] * n,
+        "dte": [dte] * n,
+        "strike": strikes,
+        "delta": deltas,
+        "bid": bids,
+        "ask": asks or [b + 0.1 for b in bids],
+    }
+
+
+class TestChainArchive:
+    """Test the columnar chain archive"""
+
+    def test_exp_day(self):
+        """callExpDateMap keys convert to days since the epoch"""
+        assert exp_day("1970-01-02:1") == 1
+
+    def test_chain_columns(self):
+        """Should convert a parsed chain to archive columns, using absolute delta"""
+        chain = {
+            "expirations": ["1970-01-08:7"],
+            "exp": [0],
+            "strike": [105.0],
+            "delta": [-0.2],
+            "dte": [7],
+            "bid": [1.0],
+            "ask": [1.2],
+        }
+
+        columns = chain_columns(chain)
+
+        assert columns["exp_day"] == [7]
+        assert columns["delta"] == [0.2]
+        assert columns["ask"] == [1.2]
+
+    def test_round_trip(self, tmp_path):
+        """Appended snapshots load back as memory-mapped columns"""
+        archive = ChainArchive(str(tmp_path))
+        archive.append(
+            "META", 100, 600.0, make_calls(5, 3, [610, 620], [0.2, 0.1], [2.0, 1.0])
+        )
+        archive.append("META", 200, 605.0, make_calls(5, 2, [610], [0.25], [2.5]))
+
+        quotes, calls = archive.load("META")
+
+        assert list(quotes["ts"]) == [100, 200]
+        assert list(quotes["underlying"]) == [600.0, 605.0]
+        assert list(calls["ts"]) == [100, 100, 200]
+        assert calls["strike"].dtype == np.float32
+        assert archive.symbols() == ["META"]
+
+    def test_skips_snapshot_from_same_second(self, tmp_path):
+        """A second snapshot with the same (or an earlier) timestamp isn't archived"""
+        archive = ChainArchive(str(tmp_path))
+        calls = make_calls(5, 3, [610], [0.2], [2.0])
+
+        assert archive.append("META", 100, 600.0, calls)
+        assert not archive.append("META", 100, 601.0, calls)
+        assert not archive.append("META", 99, 601.0, calls)
+
+        quotes, loaded = archive.load("META")
+        assert list(quotes["ts"]) == [100]
+        assert len(loaded["strike"]) == 1
+
+    def test_torn_append_is_repaired(self, tmp_path):
+        """After a crash mid-append, later snapshots still line up across columns"""
+        archive = ChainArchive(str(tmp_path))
+        archive.append("META", 100, 600.0, make_calls(5, 3, [610], [0.2], [2.0]))
+        # Crash after writing part of the next snapshot's columns
+        calls_dir = tmp_path / "META" / "calls"
+        for name, dtype in (("ts", "<i8"), ("exp_day", "<i4"), ("dte", "<i2")):
+            with open(calls_dir / name, "ab") as f:
+                f.write(np.asarray([200], dtype=dtype).tobytes())
+        with open(calls_dir / "strike", "ab") as f:
+            f.write(b"\x00\x00")
+
+        archive.append("META", 300, 605.0, make_calls(6, 2, [620], [0.1], [1.0]))
+
+        _, calls = archive.load("META")
+        assert list(calls["ts"]) == [100, 300]
+        assert list(calls["strike"]) == [610, 620]
+        assert list(calls["bid"]) == [2.0, 1.0]
+
+    def test_missing_symbol(self, tmp_path):
+        """Unknown symbols load as empty columns"""
+        quotes, calls = ChainArchive(str(tmp_path)).load("NOPE")
+
+        assert len(quotes["ts"]) == 0
+        assert len(calls["strike"]) == 0
+
+
+class TestBacktest:
+    """Test the vectorized covered-call backtester"""
+
+    def make_archive(self, tmp_path, final_price):
+        archive = ChainArchive(str(tmp_path))
+        # Day 0: sell the 105 call expiring day 3 for $1.00
+        archive.append(
+            "T", 0, 100.0, make_calls(3, 3, [105, 110], [0.15, 0.05], [1.0, 0.3])
+        )
+        archive.append(
+            "T", 3 * DAY, final_price, make_calls(10, 7, [120], [0.01], [0.05])
+        )
+        archive.append(
+            "T", 4 * DAY, final_price, make_calls(10, 6, [120], [0.01], [0.05])
+        )
+        return archive.load("T")
+
+    def test_expires_worthless(self, tmp_path):
+        """Premium is kept and nothing is assigned below the strike"""
+        quotes, calls = self.make_archive(tmp_path, 102.0)
+
+        [result] = run_backtest(quotes, calls, param_grid())
+
+        assert result["premium"] == 100.0
+        assert result["trades"] == 1
+        assert result["assignments"] == 0
+        assert result["excess_pnl"] == 100.0
+
+    def test_assignment(self, tmp_path):
+        """Finishing above the strike counts as an assignment"""
+        quotes, calls = self.make_archive(tmp_path, 108.0)
+
+        [result] = run_backtest(quotes, calls, param_grid())
+
+        assert result["assignments"] == 1
+        assert result["assignment_rate"] == 1.0
+        assert result["assignment_cost"] == 300.0
+        assert result["excess_pnl"] == -200.0
+
+    def test_duplicate_timestamps_replay_once(self, tmp_path):
+        """Two snapshots stamped the same second in an old archive count once"""
+        quotes, calls = self.make_archive(tmp_path, 102.0)
+        grid = param_grid(roll_itm=(True,))
+        [expected] = run_backtest(quotes, calls, grid)
+
+        # A second snapshot in the same second, with the price through the strike
+        first = calls["ts"] == 0
+        quotes = {k: np.concatenate([v[:1], v]) for k, v in quotes.items()}
+        quotes["underlying"][1] = 107.0
+        calls = {k: np.concatenate([v[first], v]) for k, v in calls.items()}
+        [result] = run_backtest(quotes, calls, grid)
+
+        assert result == expected
+        assert result["rolls"] == 0
+
+    def test_roll_itm_buys_back_at_ask(self, tmp_path):
+        """Rolling an in-the-money call pays the current ask"""
+        archive = ChainArchive(str(tmp_path))
+        archive.append("T", 0, 100.0, make_calls(5, 5, [105], [0.15], [1.0], [1.1]))
+        archive.append("T", DAY, 107.0, make_calls(5, 4, [105], [0.6], [2.5], [2.7]))
+
+        [result] = run_backtest(*archive.load("T"), param_grid(roll_itm=(True,)))
+
+        assert result["rolls"] == 1
+        assert result["buyback_cost"] == pytest.approx(270.0)
+
+    def test_delta_band_selects_contract(self, tmp_path):
+        """Only contracts inside the delta band are sold"""
+        quotes, calls = self.make_archive(tmp_path, 102.0)
+
+        [result] = run_backtest(quotes, calls, param_grid(delta_bands=[(0.01, 0.08)]))
+
+        assert result["premium"] == 30.0
+
+    def test_sweep_is_fast(self, tmp_path):
+        """Hundreds of policies over months of snapshots in seconds"""
+        rng = np.random.default_rng(0)
+        n_snaps, n_calls = 90 * 6, 150
+        price = 100 * np.exp(np.cumsum(rng.normal(0, 0.005, n_snaps)))
+        ts = np.arange(n_snaps) * (DAY // 6)
+        today = ts // DAY
+        strikes = np.linspace(90, 130, 15)
+        quotes = {"ts": ts, "underlying": price}
+        calls = {
+            "ts": np.repeat(ts, n_calls),
+            "exp_day": (
+                np.repeat(today, n_calls)
+                + np.tile(np.repeat(np.arange(1, 11), 15), n_snaps)
+            ).astype(np.int32),
+            "dte": np.tile(np.repeat(np.arange(1, 11), 15), n_snaps).astype(np.int16),
+            "strike": np.tile(strikes, n_snaps * 10).astype(np.float32),
+            "delta": rng.uniform(0, 0.5, n_snaps * n_calls).astype(np.float32),
+            "bid": rng.uniform(0, 3, n_snaps * n_calls).astype(np.float32),
+            "ask": rng.uniform(0, 3, n_snaps * n_calls).astype(np.float32),
+        }
+        grid = param_grid(
+            delta_bands=[(0.05, 0.1), (0.09, 0.2), (0.1, 0.3), (0.2, 0.35)],
+            dte_windows=[(1, 3), (1, 7), (3, 10), (5, 10)],
+            rank_keys=RANK_KEYS,
+            roll_dtes=(0, 1, 2),
+            roll_itm=(False, True),
+        )
+
+        start = time.perf_counter()
+        results = run_backtest(quotes, calls, grid)
+        elapsed = time.perf_counter() - start
+
+        assert len(results) == 384
+        assert all(r["trades"] > 0 for r in results)
+        assert elapsed < 10
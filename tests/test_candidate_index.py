@@ -0,0 +1,139 @@
+import pytest
+import random
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candidate_index import CandidateIndex, parse_sort
+
+
+def make_candidate(symbol, strike, delta, dte, weekly_pct):
+    return {
+        "symbol": symbol,
+        "strike": strike,
+        "exp": "2025-01-17",
+        "dte": dte,
+        "delta": delta,
+        "bid": 1.0,
+        "weeklyPct": weekly_pct,
+        "annualizedPct": weekly_pct * 52,
+        "totalPremium": 100,
+        "otmDollar": 10,
+        "otmPct": 2.0,
+    }
+
+
+@pytest.fixture
+def index():
+    return CandidateIndex(
+        [
+            make_candidate("META", 650, 0.18, 7, 0.60),
+            make_candidate("META", 660, 0.12, 7, 0.45),
+            make_candidate("NVDA", 190, 0.14, 3, 0.80),
+            make_candidate("NVDA", 195, 0.10, 3, 0.45),
+            make_candidate("AMZN", 240, 0.20, 10, 0.30),
+        ],
+        version=7,
+    )
+
+
+class TestParseSort:
+    """Test sort spec parsing"""
+
+    def test_multi_key(self):
+        """Leading minus means descending"""
+        assert parse_sort("-weeklyPct,delta") == [("weeklyPct", True), ("delta", False)]
+
+    def test_empty_sort(self):
+        """Empty spec is rejected"""
+        with pytest.raises(ValueError):
+            parse_sort("")
+
+
+class TestCandidateIndex:
+    """Test portfolio-wide candidate queries"""
+
+    def test_sorts_across_symbols(self, index):
+        """Best weekly % across the portfolio, not per ticker"""
+        result = index.query([("weeklyPct", True)], limit=2)
+
+        assert [c["strike"] for c in result["candidates"]] == [190, 650]
+        assert result["total"] == 5
+        assert result["version"] == 7
+
+    def test_secondary_key_breaks_ties(self, index):
+        """Equal weekly % should fall back to the next sort key"""
+        result = index.query([("weeklyPct", True), ("delta", False)])
+
+        strikes = [c["strike"] for c in result["candidates"]]
+        assert strikes == [190, 650, 195, 660, 240]
+
+    def test_range_filter(self, index):
+        """Only candidates under 0.15 delta"""
+        result = index.query([("weeklyPct", True)], ranges={"delta": (None, 0.15)})
+
+        assert result["total"] == 3
+        assert all(c["delta"] <= 0.15 for c in result["candidates"])
+
+    def test_symbol_and_range_filters_combine(self, index):
+        """Filters should intersect"""
+        result = index.query(
+            [("dte", False), ("strike", False)],
+            ranges={"delta": (0.12, None)},
+            symbols=["META", "AMZN"],
+        )
+
+        assert [c["strike"] for c in result["candidates"]] == [650, 660, 240]
+        assert result["total"] == 3
+
+    def test_paging(self, index):
+        """Offset/limit should page through the sorted results"""
+        first = index.query([("weeklyPct", True), ("delta", False)], limit=2)
+        second = index.query([("weeklyPct", True), ("delta", False)], offset=2, limit=2)
+
+        assert [c["strike"] for c in first["candidates"]] == [190, 650]
+        assert [c["strike"] for c in second["candidates"]] == [195, 660]
+
+    def test_unknown_field(self, index):
+        """Unknown sort or filter fields raise ValueError"""
+        with pytest.raises(ValueError):
+            index.query([("bogus", True)])
+        with pytest.raises(ValueError):
+            index.query(ranges={"bogus": (0, 1)})
+
+    def test_rows_for_symbol(self, index):
+        """rows() returns every candidate of one symbol"""
+        assert [c["strike"] for c in index.rows("META")] == [650, 660]
+        assert index.rows("TSLA") == []
+
+    def test_empty_index(self):
+        """Queries against an empty index return nothing"""
+        result = CandidateIndex([]).query()
+
+        assert result["candidates"] == []
+        assert result["total"] == 0
+
+    def test_query_is_fast(self):
+        """Filtered, sorted page over thousands of candidates stays cheap"""
+        rng = random.Random(0)
+        index = CandidateIndex(
+            [
+                make_candidate(
+                    f"T{i % 50}",
+                    rng.randint(50, 700),
+                    round(rng.uniform(0.09, 0.2), 3),
+                    rng.randint(1, 14),
+                    round(rng.uniform(0.1, 1.5), 2),
+                )
+                for i in range(5000)
+            ]
+        )
+
+        start = time.perf_counter()
+        for _ in range(100):
+            index.query([("weeklyPct", True), ("dte", False)], limit=20)
+        elapsed = (time.perf_counter() - start) / 100
+
+        assert elapsed < 0.005
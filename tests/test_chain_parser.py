@@ -0,0 +1,137 @@
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chain_parser import parse_call_chain
+
+
+def make_option(strike, delta, dte, bid, put_call="CALL"):
+    return {
+        "putCall": put_call,
+        "symbol": f"META  250117C{int(strike * 1000):08d}",
+        "description": "META Jan 17 2025 650 Call",
+        "bid": bid,
+        "ask": bid + 0.1,
+        "delta": delta,
+        "gamma": 0.01,
+        "optionDeliverablesList": [
+            {"symbol": "META", "assetType": "STOCK", "deliverableUnits": 100.0}
+        ],
+        "strikePrice": strike,
+        "daysToExpiration": dte,
+    }
+
+
+def make_payload(**overrides):
+    data = {
+        "symbol": "META",
+        "status": "SUCCESS",
+        "underlyingPrice": 633.0,
+        "callExpDateMap": {
+            "2025-01-10:3": {
+                "650.0": [make_option(650.0, 0.18, 3, 3.80)],
+                "660.0": [make_option(660.0, 0.12, 3, 2.10)],
+            },
+            "2025-01-17:10": {
+                "700.0": [make_option(700.0, 0.05, 10, 0.40)],
+            },
+        },
+        "putExpDateMap": {
+            "2025-01-10:3": {
+                "600.0": [make_option(600.0, -0.2, 3, 4.00, "PUT")],
+            },
+        },
+        "daysToExpiration": 0.0,
+    }
+    data.update(overrides)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+class TestParseCallChain:
+    """Test field-selective parsing of option chain payloads"""
+
+    def test_extracts_calls(self):
+        """Should pull strike, delta, DTE, bid, ask and expiration for each call"""
+        chain = parse_call_chain(make_payload())
+
+        assert chain["underlyingPrice"] == 633.0
+        assert chain["expirations"] == ["2025-01-10:3", "2025-01-17:10"]
+        assert list(chain["exp"]) == [0, 0, 1]
+        assert list(chain["strike"]) == [650.0, 660.0, 700.0]
+        assert list(chain["delta"]) == [0.18, 0.12, 0.05]
+        assert list(chain["dte"]) == [3, 3, 10]
+        assert list(chain["bid"]) == [3.80, 2.10, 0.40]
+
+    def test_ignores_puts_either_side(self):
+        """Puts are skipped whether they come before or after the calls"""
+        data = json.loads(make_payload())
+        reordered = {"putExpDateMap": data.pop("putExpDateMap"), **data}
+
+        chain = parse_call_chain(json.dumps(reordered).encode())
+
+        assert list(chain["strike"]) == [650.0, 660.0, 700.0]
+
+    def test_matches_json_parsing(self):
+        """Same values as reading options[0] from the fully parsed JSON"""
+        payload = make_payload()
+        chain = parse_call_chain(payload)
+
+        expected = []
+        for exp_date, strikes in json.loads(payload)["callExpDateMap"].items():
+            for options in strikes.values():
+                opt = options[0]
+                expected.append(
+                    (
+                        exp_date,
+                        opt["strikePrice"],
+                        opt["delta"],
+                        opt["daysToExpiration"],
+                        opt["bid"],
+                    )
+                )
+
+        got = [
+            (chain["expirations"][e], s, d, t, b)
+            for e, s, d, t, b in zip(
+                chain["exp"],
+                chain["strike"],
+                chain["delta"],
+                chain["dte"],
+                chain["bid"],
+            )
+        ]
+        assert got == expected
+
+    def test_first_contract_per_strike(self):
+        """Only options[0] is kept when a strike lists several contracts"""
+        payload = make_payload(
+            callExpDateMap={
+                "2025-01-10:3": {
+                    "650.0": [
+                        make_option(650.0, 0.18, 3, 3.80),
+                        make_option(650.0, 0.5, 3, 9.0),
+                    ],
+                }
+            }
+        )
+
+        chain = parse_call_chain(payload)
+
+        assert list(chain["bid"]) == [3.80]
+
+    def test_nan_delta(self):
+        """Schwab sends NaN greeks for some contracts"""
+        payload = make_payload().replace(b'"delta":0.18', b'"delta":NaN')
+
+        chain = parse_call_chain(payload)
+
+        assert chain["delta"][0] != chain["delta"][0]
+
+    def test_error_payload(self):
+        """Error responses have no calls and no underlying price"""
+        chain = parse_call_chain(b'{"errors":[{"status":"400"}]}')
+
+        assert chain["underlyingPrice"] == 0.0
+        assert len(chain["strike"]) == 0
@@ -0,0 +1,104 @@
+import pytest
+from unittest.mock import Mock
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from positions import fetch_accounts, merge_holdings
+
+
+def make_position(symbol, quantity, avg_price=100.0, asset_type="EQUITY"):
+    return {
+        "instrument": {"assetType": asset_type, "symbol": symbol},
+        "longQuantity": quantity,
+        "averagePrice": avg_price,
+        "marketValue": quantity * avg_price,
+        "longOpenProfitLoss": 0.0,
+    }
+
+
+def make_account(number, positions):
+    return {"securitiesAccount": {"accountNumber": number, "positions": positions}}
+
+
+class TestFetchAccounts:
+    """Test loading positions for all linked accounts"""
+
+    def test_uses_bulk_endpoint(self):
+        """A single all-accounts call should cover every linked account"""
+        client = Mock()
+        client.account_details_all.return_value.json.return_value = [
+            make_account("11111234", []),
+            make_account("22225678", []),
+        ]
+
+        accounts = fetch_accounts(client)
+
+        assert [a["accountNumber"] for a in accounts] == ["11111234", "22225678"]
+        client.account_details_all.assert_called_once_with(fields="positions")
+        client.account_details.assert_not_called()
+
+    def test_falls_back_to_per_account_calls(self):
+        """Should fetch each linked account when the bulk call fails"""
+        client = Mock()
+        client.account_details_all.side_effect = Exception("boom")
+        client.account_linked.return_value.json.return_value = [
+            {"hashValue": "a"},
+            {"hashValue": "b"},
+        ]
+        client.account_details.side_effect = lambda h, fields: Mock(
+            json=Mock(return_value=make_account(h, []))
+        )
+
+        accounts = fetch_accounts(client)
+
+        assert [a["accountNumber"] for a in accounts] == ["a", "b"]
+        assert client.account_details.call_count == 2
+
+
+class TestMergeHoldings:
+    """Test merging positions across accounts"""
+
+    def test_merges_symbol_across_accounts(self):
+        """Contracts should be counted per account and summed"""
+        accounts = [
+            make_account("11111234", [make_position("META", 250, 300.0)])[
+                "securitiesAccount"
+            ],
+            make_account("22225678", [make_position("META", 150, 400.0)])[
+                "securitiesAccount"
+            ],
+        ]
+
+        holdings = merge_holdings(accounts)
+
+        meta = holdings["META"]
+        assert meta["contracts"] == 3
+        assert meta["shares"] == 300
+        assert meta["totalShares"] == 400
+        assert meta["accounts"] == {"1234": 2, "5678": 1}
+        assert meta["avgPrice"] == pytest.approx((250 * 300.0 + 150 * 400.0) / 400)
+        assert meta["marketValue"] == pytest.approx(250 * 300.0 + 150 * 400.0)
+
+    def test_odd_lots_do_not_combine_across_accounts(self):
+        """Two 50-share lots in different accounts can't cover a call"""
+        accounts = [
+            make_account("1", [make_position("AAPL", 50)])["securitiesAccount"],
+            make_account("2", [make_position("AAPL", 50)])["securitiesAccount"],
+        ]
+
+        holdings = merge_holdings(accounts)
+
+        assert holdings["AAPL"]["contracts"] == 0
+        assert holdings["AAPL"]["accounts"] == {}
+
+    def test_skips_non_equity_positions(self):
+        """Should ignore options and other non-equity positions"""
+        accounts = [
+            make_account("1", [make_position("META_C", 100, asset_type="OPTION")])[
+                "securitiesAccount"
+            ],
+        ]
+
+        assert merge_holdings(accounts) == {}
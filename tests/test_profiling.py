@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import Counter
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiling import ProfileStore, Sampler, collapsed
+
+
+def busy_screening_loop(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+
+class TestSampler:
+    """Test the background stack sampler"""
+
+    def test_samples_registered_thread(self):
+        """Busy functions should show up in the sampled stacks"""
+        sampler = Sampler(interval=0.001)
+        thread_id = threading.get_ident()
+
+        sampler.start(thread_id)
+        busy_screening_loop(0.1)
+        counts = sampler.stop(thread_id)
+
+        assert sum(counts.values()) > 0
+        assert any("busy_screening_loop" in stack for stack in counts)
+
+    def test_wrapped_work_on_other_threads(self):
+        """Work handed to a pool via wrap() lands in the caller's profile"""
+        sampler = Sampler(interval=0.001)
+        thread_id = threading.get_ident()
+
+        sampler.start(thread_id)
+        worker = threading.Thread(target=sampler.wrap(busy_screening_loop), args=(0.1,))
+        worker.start()
+        worker.join()
+        counts = sampler.stop(thread_id)
+
+        assert any("busy_screening_loop" in stack for stack in counts)
+
+    def test_wrap_without_profile(self):
+        """wrap() is a no-op when the caller isn't being profiled"""
+        assert Sampler().wrap(busy_screening_loop) is busy_screening_loop
+
+    def test_stop_unknown_thread(self):
+        """Stopping a thread that was never started returns no samples"""
+        assert Sampler().stop(12345) == Counter()
+
+
+class TestCollapsed:
+    """Test flame graph output"""
+
+    def test_folded_format(self):
+        """One "stack count" line per stack, most frequent first"""
+        counts = Counter({"main;parse": 3, "main;screen": 7})
+
+        assert collapsed(counts) == "main;screen 7\nmain;parse 3\n"
+
+
+class TestProfileStore:
+    """Test the bounded profile ring buffer"""
+
+    def test_ring_buffer_is_bounded(self):
+        """Oldest profiles are evicted"""
+        store = ProfileStore(size=2)
+        ids = [store.add(Counter({"a": 1}), path=f"/{i}") for i in range(3)]
+
+        assert [p["id"] for p in store.list()] == [ids[2], ids[1]]
+        assert store.get(ids[0]) is None
+
+    def test_list_omits_stacks(self):
+        """Summaries leave out the stacks; get() includes them"""
+        store = ProfileStore()
+        profile_id = store.add(Counter({"main;jsonify": 2}), durationMs=1200.0)
+
+        [summary] = store.list()
+        assert "stacks" not in summary
+        assert summary["samples"] == 2
+        assert store.get(profile_id)["stacks"] == "main;jsonify 2\n"
@@ -0,0 +1,201 @@
+import pytest
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+import requests
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resilience
+from resilience import (
+    CircuitBreaker,
+    CircuitOpen,
+    Deadline,
+    DeadlineExceeded,
+    call_with_deadline,
+    is_upstream_failure,
+)
+
+
+def fail():
+    raise RuntimeError("upstream down")
+
+
+def http_error(status):
+    def call():
+        raise requests.HTTPError(response=Mock(status_code=status))
+
+    return call
+
+
+class TestDeadline:
+    """Test per-request time budgets"""
+
+    def test_remaining(self):
+        """Remaining time counts down and never goes negative"""
+        deadline = Deadline(0.05)
+
+        assert 0 < deadline.remaining() <= 0.05
+        time.sleep(0.06)
+        assert deadline.remaining() == 0
+        assert deadline.expired()
+
+
+class TestCircuitBreaker:
+    """Test the per-upstream circuit breaker"""
+
+    def test_opens_after_threshold(self):
+        """Consecutive failures open the circuit"""
+        breaker = CircuitBreaker("schwab", threshold=2, reset_after=60)
+
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert not breaker.allow()
+
+    def test_success_resets_failures(self):
+        """Only consecutive failures count"""
+        breaker = CircuitBreaker("schwab", threshold=2, reset_after=60)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.allow()
+
+    def test_half_open_trial(self):
+        """After reset_after, one trial call decides whether to close"""
+        breaker = CircuitBreaker("openai", threshold=1, reset_after=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+
+        assert breaker.allow()
+        assert not breaker.allow()  # only one trial at a time
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.allow()
+        assert breaker.allow()
+
+    def test_release_only_frees_own_trial(self):
+        """A call allowed while closed can't give away another caller's trial"""
+        breaker = CircuitBreaker("schwab", threshold=1, reset_after=0)
+        early = breaker.allow()
+        breaker.record_failure()
+        trial = breaker.allow()
+
+        breaker.release(early)
+        assert not breaker.allow()
+
+        breaker.release(trial)
+        assert breaker.allow()
+
+
+class TestCallWithDeadline:
+    """Test deadline- and breaker-guarded upstream calls"""
+
+    def test_returns_result(self):
+        """Calls inside the budget return normally"""
+        assert call_with_deadline(lambda: 42, Deadline(1)) == 42
+
+    def test_gives_up_at_deadline(self):
+        """A slow call stops blocking the caller when the budget runs out"""
+        breaker = CircuitBreaker("anthropic", threshold=1)
+        start = time.monotonic()
+
+        with pytest.raises(DeadlineExceeded):
+            call_with_deadline(lambda: time.sleep(1), Deadline(0.05), breaker)
+
+        assert time.monotonic() - start < 0.5
+        assert not breaker.allow()
+
+    def test_expired_deadline_skips_call(self):
+        """No upstream call is made once the budget is spent"""
+        calls = []
+
+        with pytest.raises(DeadlineExceeded):
+            call_with_deadline(lambda: calls.append(1), Deadline(0))
+
+        assert calls == []
+
+    def test_open_circuit_short_circuits(self):
+        """An open circuit fails fast without calling upstream"""
+        breaker = CircuitBreaker("schwab", threshold=1, reset_after=60)
+        with pytest.raises(RuntimeError):
+            call_with_deadline(fail, Deadline(1), breaker)
+
+        calls = []
+        with pytest.raises(CircuitOpen):
+            call_with_deadline(lambda: calls.append(1), Deadline(1), breaker)
+
+        assert calls == []
+
+    def test_queued_call_is_cancelled(self, monkeypatch):
+        """A call still waiting for a worker never runs, and doesn't count against upstream"""
+        monkeypatch.setattr(resilience, "_pool", ThreadPoolExecutor(max_workers=1))
+        release = threading.Event()
+        resilience._pool.submit(release.wait)
+        breaker = CircuitBreaker("schwab", threshold=1)
+        calls = []
+
+        with pytest.raises(DeadlineExceeded):
+            call_with_deadline(lambda: calls.append(1), Deadline(0.05), breaker)
+        release.set()
+        resilience._pool.shutdown(wait=True)
+
+        assert calls == []
+        assert breaker.allow()
+
+    def test_cancelled_trial_is_released(self, monkeypatch):
+        """A half-open trial that never ran lets the next call try again"""
+        monkeypatch.setattr(resilience, "_pool", ThreadPoolExecutor(max_workers=1))
+        breaker = CircuitBreaker("openai", threshold=1, reset_after=0)
+        breaker.record_failure()
+        release = threading.Event()
+        resilience._pool.submit(release.wait)
+
+        with pytest.raises(DeadlineExceeded):
+            call_with_deadline(lambda: None, Deadline(0.05), breaker)
+        release.set()
+
+        assert call_with_deadline(lambda: 42, Deadline(1), breaker) == 42
+
+    def test_client_errors_leave_circuit_closed(self):
+        """Repeated 4xx responses are the caller's fault, not the upstream's"""
+        breaker = CircuitBreaker("schwab", threshold=2)
+
+        for _ in range(5):
+            with pytest.raises(requests.HTTPError):
+                call_with_deadline(http_error(400), Deadline(1), breaker)
+
+        assert breaker.allow()
+
+    def test_server_errors_open_circuit(self):
+        """5xx and 429 responses count against the upstream"""
+        breaker = CircuitBreaker("schwab", threshold=2)
+
+        for status in (503, 429):
+            with pytest.raises(requests.HTTPError):
+                call_with_deadline(http_error(status), Deadline(1), breaker)
+
+        assert not breaker.allow()
+
+
+class TestIsUpstreamFailure:
+    """Test which errors count against a circuit breaker"""
+
+    def test_classification(self):
+        """Only transport errors, 5xx and 429 are upstream failures"""
+        assert is_upstream_failure(requests.ConnectionError())
+        assert is_upstream_failure(requests.HTTPError(response=Mock(status_code=502)))
+        assert not is_upstream_failure(
+            requests.HTTPError(response=Mock(status_code=404))
+        )
+        assert is_upstream_failure(Mock(spec=["status_code"], status_code=429))
+        assert not is_upstream_failure(Mock(spec=["status_code"], status_code=400))
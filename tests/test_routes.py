@@ -0,0 +1,231 @@
+import json
+import time
+import pytest
+import requests
+from unittest.mock import Mock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_cache import SharedCache
+from snapshot import RecommendationSnapshot
+from candidate_index import CandidateIndex
+from chain_parser import parse_call_chain
+
+
+def make_response(payload):
+    response = Mock()
+    response.json.return_value = payload
+    response.content = json.dumps(payload).encode()
+    return response
+
+
+ACCOUNTS = [
+    {
+        "securitiesAccount": {
+            "accountNumber": "11111234",
+            "positions": [
+                {
+                    "instrument": {"assetType": "EQUITY", "symbol": "META"},
+                    "longQuantity": 200,
+                    "averagePrice": 90,
+                    "marketValue": 20000,
+                    "longOpenProfitLoss": 100,
+                }
+            ],
+        }
+    }
+]
+
+CHAIN = {
+    "underlyingPrice": 100.0,
+    "callExpDateMap": {
+        "2030-01-10:7": {
+            "105.0": [
+                {
+                    "strikePrice": 105.0,
+                    "delta": 0.15,
+                    "daysToExpiration": 7,
+                    "bid": 1.0,
+                    "ask": 1.1,
+                }
+            ],
+            "110.0": [
+                {
+                    "strikePrice": 110.0,
+                    "delta": 0.10,
+                    "daysToExpiration": 7,
+                    "bid": 0.5,
+                    "ask": 0.6,
+                }
+            ],
+        }
+    },
+    "putExpDateMap": {},
+}
+
+
+@pytest.fixture(scope="module")
+def app_module():
+    os.environ.setdefault("OPENAI_API_KEY", "test")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+    with patch("schwabdev.Client"):
+        import app
+    return app
+
+
+@pytest.fixture
+def app_module_with_state(app_module, monkeypatch):
+    """The app with fresh per-process state and working upstream mocks"""
+    monkeypatch.setattr(
+        app_module, "recommendations_snapshot", RecommendationSnapshot()
+    )
+    monkeypatch.setattr(app_module, "candidate_index", CandidateIndex([]))
+    monkeypatch.setattr(app_module, "shared_state_stamp", None)
+    monkeypatch.setattr(app_module, "shared_cache", None)
+    monkeypatch.setattr(app_module, "last_good", {})
+    for breaker in app_module.breakers.values():
+        breaker.record_success()
+    app_module.client.account_details_all.return_value = make_response(ACCOUNTS)
+    app_module.client.option_chains.side_effect = None
+    app_module.client.option_chains.return_value = make_response(CHAIN)
+    return app_module
+
+
+def new_worker(app_module):
+    """Forget per-process state, as a freshly started worker would"""
+    app_module.recommendations_snapshot = RecommendationSnapshot()
+    app_module.candidate_index = CandidateIndex([])
+    app_module.shared_state_stamp = None
+
+
+class TestSharedState:
+    """Test that workers sharing a cache serve the same snapshot and index"""
+
+    def test_candidates_from_another_worker(self, app_module_with_state, tmp_path):
+        """A worker that hasn't screened anything serves the published index"""
+        app = app_module_with_state
+        app.shared_cache = SharedCache(str(tmp_path / "cache.sqlite"))
+        version = app.app.test_client().get("/api/recommendations").json["version"]
+
+        new_worker(app)
+        result = app.app.test_client().get("/api/candidates").json
+
+        assert result["version"] == version
+        assert result["total"] == 2
+
+    def test_since_across_workers(self, app_module_with_state, tmp_path):
+        """A version issued by one worker is honoured by another"""
+        app = app_module_with_state
+        app.shared_cache = SharedCache(str(tmp_path / "cache.sqlite"))
+        client = app.app.test_client()
+        version = client.get("/api/recommendations").json["version"]
+
+        new_worker(app)
+        delta = client.get(f"/api/recommendations?since={version}").json
+
+        assert delta["full"] is False
+        assert delta["changed"] == {}
+        assert delta["version"] == version
+
+
+def slow_parse_call_chain(payload):
+    end = time.perf_counter() + 0.2
+    while time.perf_counter() < end:
+        pass
+    return parse_call_chain(payload)
+
+
+class TestRecommendationsRoute:
+    """Test /api/recommendations under upstream failures and profiling"""
+
+    def test_profile_includes_chain_parsing(self, app_module_with_state, monkeypatch):
+        """Parsing done on pool threads still shows up in the request's profile"""
+        app = app_module_with_state
+        monkeypatch.setattr(app, "parse_call_chain", slow_parse_call_chain)
+        client = app.app.test_client()
+
+        response = client.get("/api/recommendations?profile=1")
+        profile_id = response.headers["X-Profile-Id"]
+        stacks = client.get(f"/admin/profiles/{profile_id}").get_data(as_text=True)
+
+        assert "slow_parse_call_chain" in stacks
+
+    def test_failed_chain_keeps_all_candidates(self, app_module_with_state):
+        """A ticker that can't be refreshed keeps every indexed candidate, not just the top 10"""
+        app = app_module_with_state
+        strikes = {
+            f"{strike}.0": [
+                {
+                    "strikePrice": strike,
+                    "delta": 0.15,
+                    "daysToExpiration": 7,
+                    "bid": 1.0,
+                    "ask": 1.1,
+                }
+            ]
+            for strike in range(101, 113)
+        }
+        chain = {"underlyingPrice": 100.0, "callExpDateMap": {"2030-01-10:7": strikes}}
+        app.client.option_chains.return_value = make_response(chain)
+        client = app.app.test_client()
+        client.get("/api/recommendations")
+
+        # No last-known-good chain to fall back on either
+        app.last_good.clear()
+        app.client.option_chains.side_effect = RuntimeError("upstream down")
+        result = client.get("/api/recommendations").json
+
+        assert result["missing"] == ["META"]
+        assert client.get("/api/candidates?symbol=META").json["total"] == 12
+
+
+class TestRecommendationRoute:
+    """Test /api/recommendation/<symbol>"""
+
+    def test_reports_real_share_count(self, app_module_with_state):
+        """Odd lots are counted in the prompt and position, not rounded to contracts"""
+        app = app_module_with_state
+        accounts = json.loads(json.dumps(ACCOUNTS))
+        accounts[0]["securitiesAccount"]["positions"][0]["longQuantity"] = 250
+        app.client.account_details_all.return_value = make_response(accounts)
+        prompts = []
+
+        def call_llm(provider, model, prompt, timeout=None):
+            prompts.append(prompt)
+            return "**Recommendation: HOLD**"
+
+        with patch.object(app, "call_llm", call_llm):
+            result = app.app.test_client().get("/api/recommendation/META").json
+
+        assert result["position"]["totalShares"] == 250
+        assert result["position"]["contracts"] == 2
+        assert "- Shares: 250" in prompts[0]
+
+
+class TestCandlesRoute:
+    """Test /api/candles/<symbol>"""
+
+    def test_bad_symbols_dont_open_the_circuit(self, app_module_with_state):
+        """Repeated 400s for an unknown symbol leave Schwab usable for everyone else"""
+        app = app_module_with_state
+        bad = make_response({})
+        bad.raise_for_status.side_effect = requests.HTTPError(
+            response=Mock(status_code=400)
+        )
+        app.client.price_history.return_value = bad
+        client = app.app.test_client()
+
+        for _ in range(6):
+            assert client.get("/api/candles/ZZZZ").status_code == 500
+
+        app.client.price_history.return_value = make_response(
+            {
+                "candles": [
+                    {"datetime": 0, "open": 1, "high": 2, "low": 0.5, "close": 1.5}
+                ]
+            }
+        )
+        assert app.breakers["schwab"].allow()
+        assert client.get("/api/candles/NVDA").status_code == 200
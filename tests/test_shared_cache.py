@@ -0,0 +1,133 @@
+import multiprocessing
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_cache import SharedCache
+
+
+def load_in_worker(path, calls_file):
+    def loader():
+        with open(calls_file, "a") as f:
+            f.write("call\n")
+        time.sleep(0.2)
+        return {"bid": 1.5}
+
+    return SharedCache(path).get_or_load("chain:META", 30, loader)
+
+
+class TestSharedCache:
+    """Test the cross-process SQLite cache"""
+
+    def test_set_and_get(self, tmp_path):
+        """Values round-trip as JSON"""
+        cache = SharedCache(str(tmp_path / "cache.sqlite"))
+        cache.set("positions:all", [{"accountNumber": "1234"}], ttl=30)
+
+        assert cache.get("positions:all") == [{"accountNumber": "1234"}]
+
+    def test_expired_entries_miss(self, tmp_path):
+        """Expired values are not returned"""
+        cache = SharedCache(str(tmp_path / "cache.sqlite"))
+        cache.set("candles:META:5d", [1, 2, 3], ttl=-1)
+
+        assert cache.get("candles:META:5d") is None
+
+    def test_get_or_load_caches(self, tmp_path):
+        """Loader runs once, later calls hit the cache"""
+        cache = SharedCache(str(tmp_path / "cache.sqlite"))
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return "SELL"
+
+        assert cache.get_or_load("llm:abc", 30, loader) == "SELL"
+        assert cache.get_or_load("llm:abc", 30, loader) == "SELL"
+        assert len(calls) == 1
+
+    def test_loader_errors_are_not_cached(self, tmp_path):
+        """A failing loader propagates and leaves nothing behind"""
+        cache = SharedCache(str(tmp_path / "cache.sqlite"))
+
+        def loader():
+            raise RuntimeError("upstream down")
+
+        try:
+            cache.get_or_load("chain:NVDA", 30, loader)
+        except RuntimeError:
+            pass
+
+        assert cache.get("chain:NVDA") is None
+
+    def test_single_flight_across_processes(self, tmp_path):
+        """Concurrent workers should make one upstream call between them"""
+        path = str(tmp_path / "cache.sqlite")
+        calls_file = str(tmp_path / "calls.txt")
+        SharedCache(path)
+
+        with multiprocessing.get_context("fork").Pool(4) as pool:
+            results = pool.starmap(load_in_worker, [(path, calls_file)] * 4)
+
+        assert results == [{"bid": 1.5}] * 4
+        with open(calls_file) as f:
+            assert len(f.readlines()) == 1
+
+    def test_get_stale_returns_expired_values(self, tmp_path):
+        """Expired values stay available as last-known-good, with their age"""
+        cache = SharedCache(str(tmp_path / "cache.sqlite"))
+        before = time.time()
+        cache.set("chain:META", {"bid": 1.5}, ttl=-1)
+
+        value, stored_at = cache.get_stale("chain:META")
+
+        assert value == {"bid": 1.5}
+        assert stored_at >= before
+        assert cache.get_stale("chain:NVDA") is None
+
+    def test_lock_timeout(self, tmp_path):
+        """Waiting on a held lock gives up after the timeout"""
+        cache = SharedCache(str(tmp_path / "cache.sqlite"))
+
+        with cache.lock("chain:META"):
+            start = time.monotonic()
+            try:
+                with cache.lock("chain:META", timeout=0.1):
+                    assert False, "lock should be held"
+            except TimeoutError:
+                pass
+
+        assert time.monotonic() - start < 1
+
+    def test_lock_files_are_bounded(self, tmp_path):
+        """Lock files are striped, not created per key"""
+        cache = SharedCache(str(tmp_path / "cache.sqlite"))
+
+        for i in range(500):
+            cache.get_or_load(f"llm:{i}", 30, lambda: "HOLD")
+
+        assert len(os.listdir(cache.lock_dir)) <= SharedCache.LOCK_STRIPES
+
+    def test_no_connection_kept_from_init(self, tmp_path):
+        """Creating the cache leaves no connection for forked workers to inherit"""
+        cache = SharedCache(str(tmp_path / "cache.sqlite"))
+
+        assert getattr(cache._local, "conn", None) is None
+
+    def test_reconnects_after_fork(self, tmp_path):
+        """A forked worker opens its own connection instead of reusing the parent's"""
+        cache = SharedCache(str(tmp_path / "cache.sqlite"))
+        cache.set("positions:all", [1], ttl=30)
+        parent_conn = cache._connect()
+
+        pid = os.fork()
+        if pid == 0:
+            ok = cache._connect() is not parent_conn and cache.get("positions:all") == [
+                1
+            ]
+            os._exit(0 if ok else 1)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
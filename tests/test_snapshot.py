@@ -0,0 +1,77 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snapshot import RecommendationSnapshot
+
+
+def make_rec(price, bid=1.0):
+    return {
+        "info": {"shares": 100},
+        "price": price,
+        "contracts": 1,
+        "candidates": [{"bid": bid}],
+    }
+
+
+class TestRecommendationSnapshot:
+    """Test versioned recommendation snapshots"""
+
+    def test_full_payload_without_since(self):
+        """No `since` should return every ticker"""
+        snapshot = RecommendationSnapshot()
+        version = snapshot.update({"META": make_rec(600), "NVDA": make_rec(180)})
+
+        delta = snapshot.delta()
+
+        assert delta["full"] is True
+        assert delta["version"] == version
+        assert set(delta["changed"]) == {"META", "NVDA"}
+
+    def test_only_changed_tickers_after_since(self):
+        """Should return only tickers whose data changed"""
+        snapshot = RecommendationSnapshot()
+        first = snapshot.update({"META": make_rec(600), "NVDA": make_rec(180)})
+        snapshot.update({"META": make_rec(600), "NVDA": make_rec(181)})
+
+        delta = snapshot.delta(first)
+
+        assert delta["full"] is False
+        assert list(delta["changed"]) == ["NVDA"]
+        assert delta["removed"] == []
+
+    def test_reports_removed_tickers(self):
+        """Tickers dropped from the snapshot should be listed as removed"""
+        snapshot = RecommendationSnapshot()
+        first = snapshot.update({"META": make_rec(600), "NVDA": make_rec(180)})
+        snapshot.update({"META": make_rec(600)})
+
+        delta = snapshot.delta(first)
+
+        assert delta["changed"] == {}
+        assert delta["removed"] == ["NVDA"]
+
+    def test_unchanged_update_keeps_version(self):
+        """Identical data shouldn't bump the version"""
+        snapshot = RecommendationSnapshot()
+        first = snapshot.update({"META": make_rec(600)})
+
+        assert snapshot.update({"META": make_rec(600)}) == first
+        assert snapshot.delta(first)["changed"] == {}
+
+    def test_unknown_version_returns_full(self):
+        """A version from another process should get the full payload"""
+        snapshot = RecommendationSnapshot()
+        version = snapshot.update({"META": make_rec(600)})
+
+        assert snapshot.delta(version + 1000)["full"] is True
+        assert snapshot.delta(version - 1000)["full"] is True
+
+    def test_get_returns_current_entry(self):
+        """get() returns the latest data for a ticker"""
+        snapshot = RecommendationSnapshot()
+        snapshot.update({"META": make_rec(600)})
+
+        assert snapshot.get("META")["price"] == 600
+        assert snapshot.get("NVDA") is None